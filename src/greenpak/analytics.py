@@ -0,0 +1,173 @@
+"""Vectorized analytics of many GreenPak configurations.
+
+Configurations are handled as an (N, 256) uint8 byte matrix, with a row per configuration,
+or as an (N, 2048) uint8 bit matrix whose column ``i`` is configuration bit ``i``, in the
+same order as the GreenPAK Designer bits files.
+
+This module requires the optional ``numpy`` package.
+"""
+
+import numpy as np
+from typing import List, Sequence
+import os
+
+import greenpak.devices as devices
+import greenpak.utils as utils
+
+
+def load_images(file_paths: Sequence[str]) -> np.ndarray:
+    """Loads configuration files into a byte matrix.
+
+    Files with a ``.hex`` extension are read with ``utils.read_hex_config_file()`` and the
+    others with ``utils.read_bits_config_file()``.
+
+    :param file_paths: The paths of the configuration files.
+    :type file_paths: Sequence[str]
+
+    :returns: An (N, 256) uint8 matrix with a row per file.
+    :rtype: numpy.ndarray
+    """
+    images = []
+    for file_path in file_paths:
+        if os.path.splitext(file_path)[1].lower() == ".hex":
+            images.append(utils.read_hex_config_file(file_path))
+        else:
+            images.append(utils.read_bits_config_file(file_path))
+    return images_to_matrix(images)
+
+
+def images_to_matrix(images: Sequence[bytes]) -> np.ndarray:
+    """Converts configurations to a byte matrix.
+
+    :param images: 256 bytes configurations.
+    :type images: Sequence[bytes or bytearray]
+
+    :returns: An (N, 256) uint8 matrix with a row per configuration.
+    :rtype: numpy.ndarray
+    """
+    result = np.empty((len(images), 256), dtype=np.uint8)
+    for i, image in enumerate(images):
+        assert len(image) == 256
+        result[i] = np.frombuffer(bytes(image), dtype=np.uint8)
+    return result
+
+
+def to_bits(byte_matrix: np.ndarray) -> np.ndarray:
+    """Converts a (N, 256) byte matrix to a (N, 2048) bit matrix of 0/1 values."""
+    assert byte_matrix.ndim == 2 and byte_matrix.shape[1] == 256
+    return np.unpackbits(byte_matrix.astype(np.uint8), axis=1, bitorder="little")
+
+
+def hamming_distances(byte_matrix: np.ndarray) -> np.ndarray:
+    """Computes the pairwise Hamming distances of configurations.
+
+    :param byte_matrix: An (N, 256) byte matrix.
+    :type byte_matrix: numpy.ndarray
+
+    :returns: An (N, N) int32 matrix with the number of differing bits of each pair.
+    :rtype: numpy.ndarray
+    """
+    bits = to_bits(byte_matrix).astype(np.float32)
+    # For 0/1 vectors, |a - b| = a.(1 - b) + (1 - a).b, computed as matrix products. The
+    # values are small integers and are exact in float32.
+    ones = bits.sum(axis=1)
+    common = bits @ bits.T
+    distances = ones[:, None] + ones[None, :] - 2 * common
+    return np.rint(distances).astype(np.int32)
+
+
+def bit_variance(byte_matrix: np.ndarray) -> np.ndarray:
+    """Computes the variance of each configuration bit across configurations.
+
+    :param byte_matrix: An (N, 256) byte matrix.
+    :type byte_matrix: numpy.ndarray
+
+    :returns: A (2048,) float64 vector. Zero for bits that are the same in all configurations.
+    :rtype: numpy.ndarray
+    """
+    return to_bits(byte_matrix).var(axis=0, dtype=np.float64)
+
+
+def cluster(byte_matrix: np.ndarray, max_distance: int, chunk_size: int = 1024) -> np.ndarray:
+    """Groups configurations into clusters, e.g. of the same design.
+
+    Configurations are in the same cluster if they are connected by a chain of
+    configurations that are at most ``max_distance`` bits apart. The distances are computed
+    a chunk of rows at a time, so memory grows linearly with the number of configurations.
+
+    :param byte_matrix: An (N, 256) byte matrix.
+    :type byte_matrix: numpy.ndarray
+
+    :param max_distance: The max Hamming distance of neighbor configurations.
+    :type max_distance: int
+
+    :param chunk_size: The number of rows whose distances to all configurations are
+        computed at once.
+    :type chunk_size: int
+
+    :returns: An (N,) int32 vector with the cluster index of each configuration. Clusters are
+        numbered from 0 in the order of their first configuration.
+    :rtype: numpy.ndarray
+    """
+    assert max_distance >= 0
+    assert chunk_size > 0
+    bits = to_bits(byte_matrix).astype(np.float32)
+    ones = bits.sum(axis=1)
+    n = bits.shape[0]
+    # A union-find forest whose roots are the smallest index of their cluster.
+    parent = np.arange(n)
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        # As in hamming_distances(), for the rows of the chunk and the rows that follow.
+        common = bits[start:end] @ bits[start:].T
+        distances = ones[start:end, None] + ones[None, start:] - 2 * common
+        rows, cols = np.nonzero(np.rint(distances) <= max_distance)
+        rows += start
+        cols += start
+        while True:
+            roots_a = _find_roots(parent, rows)
+            roots_b = _find_roots(parent, cols)
+            pending = roots_a != roots_b
+            if not pending.any():
+                break
+            roots_a = roots_a[pending]
+            roots_b = roots_b[pending]
+            rows = rows[pending]
+            cols = cols[pending]
+            np.minimum.at(parent, np.maximum(roots_a, roots_b), np.minimum(roots_a, roots_b))
+    roots = _find_roots(parent, np.arange(n))
+    # Roots are the first configuration of their cluster, so sorted roots are in cluster order.
+    return np.unique(roots, return_inverse=True)[1].astype(np.int32)
+
+
+def _find_roots(parent: np.ndarray, indexes: np.ndarray) -> np.ndarray:
+    """Returns the roots of the given indexes in a union-find forest, compressing the paths
+    of the whole forest."""
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            return parent[indexes]
+        parent[:] = grandparent
+
+
+def diff_from_default(byte_matrix: np.ndarray, device_type: str) -> np.ndarray:
+    """Finds the bits that differ from the default configuration of a device type.
+
+    :param byte_matrix: An (N, 256) byte matrix.
+    :type byte_matrix: numpy.ndarray
+
+    :param device_type: A supported device type, such as ``"SLG46826"``.
+    :type device_type: str
+
+    :returns: An (N, 2048) bool matrix, True for bits that differ from the
+        ``DeviceTypeDescriptor.default_config`` of the device type.
+    :rtype: numpy.ndarray
+    """
+    default_config = devices.device_type_descriptor(device_type).default_config
+    default_bytes = np.frombuffer(bytes(default_config), dtype=np.uint8)
+    return to_bits(byte_matrix ^ default_bytes[None, :]).astype(bool)
+
+
+def differing_bits(byte_matrix: np.ndarray) -> List[int]:
+    """Returns the sorted indexes of the bits that are not the same in all configurations."""
+    return np.flatnonzero(bit_variance(byte_matrix) > 0).tolist()
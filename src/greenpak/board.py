@@ -0,0 +1,262 @@
+"""Programming of boards with several GreenPak devices on the same I2C bus."""
+
+from greenpak.driver import (
+    GreenpakDriver,
+    GreenpakError,
+    RESET_TIMEOUT_SECS,
+    RESET_POLL_SECS,
+    RESET_MIN_SECS,
+)
+from greenpak.i2c import GreenPakI2cInterface
+from greenpak.planner import PageAction, plan_programming
+import greenpak.devices as devices
+from typing import Optional, List, Tuple, Dict
+import time
+
+
+class BoardDevice:
+    """A GreenPak device position of a board.
+
+    :param device_type: The device type, such as ``"SLG46826"``.
+    :type device_type: str
+
+    :param control_code_spec: The control code spec of the device, as passed to
+        ``GreenpakDriver.program_control_code()``, such as ``"01XX"``.
+    :type control_code_spec: str
+
+    :param control_code: The control code that the device has with this spec, given the
+        wiring of its control code pins on the board.
+    :type control_code: int
+
+    :param nvm_image: The 256 bytes NVM configuration of the device, or None to not program
+        the NVM. Its control code byte is patched per ``control_code_spec``.
+    :type nvm_image: bytes | bytearray | None
+
+    :param eeprom_image: The 256 bytes EEPROM data of the device, or None to not program the
+        EEPROM.
+    :type eeprom_image: bytes | bytearray | None
+    """
+
+    def __init__(
+        self,
+        device_type: str,
+        control_code_spec: str,
+        control_code: int,
+        nvm_image: Optional[bytes | bytearray] = None,
+        eeprom_image: Optional[bytes | bytearray] = None,
+    ):
+        assert isinstance(device_type, str)
+        assert 0 <= control_code <= 15
+        control_byte = devices.control_code_config_byte(control_code_spec)
+        # Internal control code bits must match the control code.
+        internal_mask = ~(control_byte >> 4) & 0x0F
+        assert (control_code & internal_mask) == (control_byte & internal_mask), (
+            f"Control code {control_code} doesn't match spec {control_code_spec}"
+        )
+        assert nvm_image is None or len(nvm_image) == 256
+        assert eeprom_image is None or len(eeprom_image) == 256
+        self.device_type: str = device_type
+        self.control_code_spec: str = control_code_spec
+        self.control_code: int = control_code
+        self.nvm_image: Optional[bytes] = None if nvm_image is None else bytes(nvm_image)
+        self.eeprom_image: Optional[bytes] = (
+            None if eeprom_image is None else bytes(eeprom_image)
+        )
+
+
+class BoardProfile:
+    """The GreenPak devices of a board.
+
+    :param devices: The device positions of the board, with distinct control codes.
+    :type devices: List[BoardDevice]
+
+    :param default_control_code: The control code of unprogrammed devices. Renesas ships
+        devices with control code 1.
+    :type default_control_code: int
+    """
+
+    def __init__(self, devices: List[BoardDevice], default_control_code: int = 0b0001):
+        assert len(devices) > 0
+        control_codes = [d.control_code for d in devices]
+        assert len(set(control_codes)) == len(control_codes), "Duplicate control codes"
+        assert 0 <= default_control_code <= 15
+        # A device at the default control code can't be told apart from unprogrammed ones.
+        assert len(devices) == 1 or default_control_code not in control_codes
+        self.devices: List[BoardDevice] = list(devices)
+        self.default_control_code: int = default_control_code
+
+
+def _reset_and_wait(gp_driver: GreenpakDriver, control_codes: List[int]) -> None:
+    """Resets the devices at the driver's control code and waits until all the given
+    control codes respond. As in ``GreenpakDriver.reset_device()``, responses are accepted
+    only after the reset devices stopped responding or after ``RESET_MIN_SECS``, and the
+    timeout derives from the timing profile."""
+    reset_code = gp_driver.get_device_control_code()
+    gp_driver.write_register_bytes(devices.RESET_BYTE_ADDR, bytearray([0x02]))
+    start_time = time.monotonic()
+    timeout_secs = max(RESET_TIMEOUT_SECS, 10 * gp_driver.get_timing_profile().reset_secs)
+    deadline = start_time + timeout_secs
+    while time.monotonic() < start_time + RESET_MIN_SECS:
+        if not gp_driver.scan_greenpak_device(reset_code):
+            break
+        time.sleep(RESET_POLL_SECS)
+    pending = list(control_codes)
+    while True:
+        pending = [c for c in pending if not gp_driver.scan_greenpak_device(c)]
+        if not pending:
+            return
+        if time.monotonic() >= deadline:
+            raise GreenpakError(f"Control codes {pending} didn't respond after a reset.")
+        time.sleep(RESET_POLL_SECS)
+
+
+def _disambiguate(
+    i2c_driver: GreenPakI2cInterface, profile: BoardProfile, counters: Dict[str, int]
+) -> None:
+    """Moves the devices that don't respond at their control codes from the default
+    control code to their control codes."""
+    probe = GreenpakDriver(
+        i2c_driver, profile.devices[0].device_type, profile.default_control_code
+    )
+    pending = [
+        d for d in profile.devices if not probe.scan_greenpak_device(d.control_code)
+    ]
+    if not pending:
+        return
+    assert probe.scan_greenpak_device(
+        profile.default_control_code
+    ), "Devices not found at their control codes or at the default control code"
+    # Devices of the same type at the default control code are programmed together, so
+    # they need the same spec.
+    specs: Dict[str, str] = {}
+    for d in pending:
+        assert specs.setdefault(d.device_type, d.control_code_spec) == d.control_code_spec
+    device_types = list(specs.keys())
+    moved: List[int] = []
+    for i, device_type in enumerate(device_types):
+        probe.set_device_type(device_type)
+        probe.program_control_code(specs[device_type])
+        counters["disambiguated_types"] += 1
+        moved.extend(d.control_code for d in pending if d.device_type == device_type)
+        # Programming the control code page of a type also writes that page of the other
+        # devices at the default control code, so the devices must move before a later
+        # type with the same control code page is programmed.
+        page_index = devices.device_type_descriptor(device_type).control_code_addr >> 4
+        if i + 1 == len(device_types) or any(
+            devices.device_type_descriptor(t).control_code_addr >> 4 == page_index
+            for t in device_types[i + 1 :]
+        ):
+            _reset_and_wait(probe, moved)
+            counters["resets"] += 1
+            moved = []
+
+
+def _page_jobs(gp_driver: GreenpakDriver, board_device: BoardDevice) -> List[Tuple]:
+    """Returns the (space, page_index, page_data, erase) pages that need programming."""
+    nvm_image = None
+    if board_device.nvm_image is not None:
+        nvm_image = bytearray(board_device.nvm_image)
+        gp_driver.adjust_control_code(nvm_image, board_device.control_code_spec)
+    plan = plan_programming(gp_driver, nvm_image, board_device.eeprom_image)
+    jobs = []
+    for space, image in (("NVM", plan.nvm_image), ("EEPROM", plan.eeprom_image)):
+        for page_index in plan.pages(space, PageAction.ERASE_WRITE):
+            jobs.append((space, page_index, image[page_index << 4 : (page_index + 1) << 4], True))
+        for page_index in plan.pages(space, PageAction.WRITE):
+            jobs.append((space, page_index, image[page_index << 4 : (page_index + 1) << 4], False))
+    return sorted(jobs, key=lambda job: (job[0], job[1]))
+
+
+def _program_round(
+    i2c_driver: GreenPakI2cInterface, round_jobs: List[Tuple[GreenpakDriver, Tuple]]
+) -> None:
+    """Programs a page of each of several devices, interleaving their erase and write waits.
+    If the interleaved batch fails, the pages are programmed one by one, with retries."""
+    phases: List[List[Tuple]] = [[], [], [], []]
+    erase_secs = 0.0
+    write_secs = 0.0
+    for gp_driver, (space, page_index, page_data, erase) in round_jobs:
+        for phase, ops in zip(phases, gp_driver.page_program_ops(space, page_index, page_data, erase)):
+            phase.extend(ops)
+        timing_profile = gp_driver.get_timing_profile()
+        if erase:
+            erase_secs = max(erase_secs, timing_profile.erase_secs)
+        write_secs = max(write_secs, timing_profile.write_secs)
+    ops = phases[0]
+    if phases[0]:
+        ops = ops + [("sleep", erase_secs)] + phases[1]
+    ops = ops + phases[2] + [("sleep", write_secs)] + phases[3]
+    results = i2c_driver.gp_batch(ops)
+    # The erase writes are "write_ignore" operations, since devices may NACK them even when
+    # the erase succeeds. Only the other operations, including the erase verifications,
+    # decide the outcome and feed the auto speed statistics.
+    ok = len(results) == len(ops)
+    for op, result in zip(ops, results):
+        if op[0] not in ("sleep", "write_ignore"):
+            i2c_driver.gp_report_transaction(bool(result))
+            ok = ok and result is not None and result is not False
+    if ok:
+        return
+    for gp_driver, (space, page_index, page_data, _) in round_jobs:
+        if space == "NVM":
+            gp_driver.program_nvm_pages(page_index, page_data)
+        else:
+            gp_driver.program_eeprom_pages(page_index, page_data)
+
+
+def program_board(i2c_driver: GreenPakI2cInterface, profile: BoardProfile) -> Dict[str, int]:
+    """Programs the GreenPak devices of a board.
+
+    Devices that don't respond at their control codes are first moved from the default
+    control code, by programming the control code of each device type, as described in
+    ``GreenpakDriver.program_control_code()``, with a reset only where needed. Each device
+    is then read with a single bulk read per memory space, and devices whose content is
+    already correct are skipped. The pages that need programming are programmed in rounds
+    of a page per device, such that the erase and write waits of the devices overlap.
+    Finally, each device whose NVM changed is reset.
+
+    :param i2c_driver: The I2C driver of the board's bus.
+    :type i2c_driver: GreenPakI2cInterface
+
+    :param profile: The board profile.
+    :type profile: BoardProfile
+
+    :returns: A dict with the number of ``"disambiguated_types"``, ``"resets"``,
+        ``"programmed_pages"`` and ``"skipped_devices"``.
+    :rtype: Dict[str, int]
+    """
+    assert isinstance(profile, BoardProfile)
+    counters = {
+        "disambiguated_types": 0,
+        "resets": 0,
+        "programmed_pages": 0,
+        "skipped_devices": 0,
+    }
+    _disambiguate(i2c_driver, profile, counters)
+
+    # The pages to program of each device.
+    gp_drivers = [
+        GreenpakDriver(i2c_driver, d.device_type, d.control_code) for d in profile.devices
+    ]
+    device_jobs = [_page_jobs(gp_driver, d) for gp_driver, d in zip(gp_drivers, profile.devices)]
+    counters["skipped_devices"] = sum(1 for jobs in device_jobs if not jobs)
+
+    num_rounds = max(len(jobs) for jobs in device_jobs)
+    for k in range(num_rounds):
+        round_jobs = [
+            (gp_driver, jobs[k])
+            for gp_driver, jobs in zip(gp_drivers, device_jobs)
+            if k < len(jobs)
+        ]
+        print(f"Programming round {k + 1}/{num_rounds}, {len(round_jobs)} pages.", flush=True)
+        _program_round(i2c_driver, round_jobs)
+        counters["programmed_pages"] += len(round_jobs)
+
+    # The devices keep their control codes, since their NVM images were patched with their
+    # control code specs.
+    control_codes = [d.control_code for d in profile.devices]
+    for gp_driver, jobs in zip(gp_drivers, device_jobs):
+        if any(job[0] == "NVM" for job in jobs):
+            _reset_and_wait(gp_driver, control_codes)
+            counters["resets"] += 1
+    return counters
@@ -21,6 +21,13 @@ import greenpak.utils as utils
 # The byte that is used to trigger the erase page command.
 ERASE_BYTE_ADDR: int = 0xE3
 
+# The byte whose bit 1 triggers a device reset (bit 1601 of the REGISTER space).
+RESET_BYTE_ADDR: int = 0xC8
+
+# The REGISTER space bytes of the SLG4682x devices that are not plain configuration
+# memory. The connection matrix outputs (0x74-0x79) are read-only live status.
+__SLG4682X_VOLATILE_REGISTER_ADDRS = [*range(0x74, 0x7A), RESET_BYTE_ADDR, ERASE_BYTE_ADDR]
+
 
 class DeviceTypeDescriptor:
     """Descriptor of a GreenPak device.
@@ -45,6 +52,16 @@ class DeviceTypeDescriptor:
     :param default_config_file_name: The name of the data file which contains the default configuration of the device.
        That is, the configuration of a factory reset device, as read from the NVM.
     :type default_config_file_name: str
+
+    :param volatile_register_addrs: Addresses of REGISTER space bytes that are not plain configuration
+        memory, such as the erase and reset trigger bytes and read-only live status bytes. These bytes
+        are never rewritten as a side effect of writing their neighbors.
+    :type volatile_register_addrs: List[int]
+
+    :param volatile_register_addrs_complete: False if ``volatile_register_addrs`` is known to
+        miss some of the device's status bytes. Gaps between REGISTER writes are then never
+        bridged, since the bridged bytes may include unlisted status bytes.
+    :type volatile_register_addrs_complete: bool
     """
 
     def __init__(
@@ -55,6 +72,8 @@ class DeviceTypeDescriptor:
         erase_byte_mask: int,
         control_code_addr: int,
         default_config_file_name: str,
+        volatile_register_addrs: List[int],
+        volatile_register_addrs_complete: bool = True,
     ):
         assert isinstance(device_type, str)
         assert len(device_type) > 0
@@ -71,6 +90,12 @@ class DeviceTypeDescriptor:
         assert isinstance(control_code_addr, int)
         assert 0 <= control_code_addr < 256
         assert isinstance(default_config_file_name, str)
+        assert isinstance(volatile_register_addrs, list)
+        for addr in volatile_register_addrs:
+            assert isinstance(addr, int)
+            assert 0 <= addr <= 255
+        assert erase_byte_addr in volatile_register_addrs
+        assert isinstance(volatile_register_addrs_complete, bool)
 
         self.device_type: str = device_type
         self.ro_nvm_pages: List[int] = ro_nvm_pages
@@ -79,21 +104,50 @@ class DeviceTypeDescriptor:
         self.control_code_addr: int = control_code_addr
         fname = impresources.files(data_files) / default_config_file_name
         self.default_config: bytes = bytes(utils.read_hex_config_file(fname))
+        self.volatile_register_addrs: List[int] = sorted(volatile_register_addrs)
+        self.volatile_register_addrs_complete: bool = volatile_register_addrs_complete
 
 
 # List of supported device.
 __DEVICE_LIST = [
     DeviceTypeDescriptor(
-        "SLG46824", [15], 0xE3, 0b10000000, 0xCA, "SLG46824_default.hex"
+        "SLG46824",
+        [15],
+        0xE3,
+        0b10000000,
+        0xCA,
+        "SLG46824_default.hex",
+        __SLG4682X_VOLATILE_REGISTER_ADDRS,
     ),
     DeviceTypeDescriptor(
-        "SLG46826", [15], 0xE3, 0b10000000, 0xCA, "SLG46826_default.hex"
+        "SLG46826",
+        [15],
+        0xE3,
+        0b10000000,
+        0xCA,
+        "SLG46826_default.hex",
+        __SLG4682X_VOLATILE_REGISTER_ADDRS,
     ),
     DeviceTypeDescriptor(
-        "SLG46827", [15], 0xE3, 0b10000000, 0xCA, "SLG46827_default.hex"
+        "SLG46827",
+        [15],
+        0xE3,
+        0b10000000,
+        0xCA,
+        "SLG46827_default.hex",
+        __SLG4682X_VOLATILE_REGISTER_ADDRS,
     ),
+    # Only the trigger bytes of the SLG47004 are listed as volatile. Its read-only status
+    # bytes are not mapped yet, so REGISTER writes don't bridge gaps on this device.
     DeviceTypeDescriptor(
-        "SLG47004", [8, 15], 0xE3, 0b11000000, 0x7F, "SLG47004_default.hex"
+        "SLG47004",
+        [8, 15],
+        0xE3,
+        0b11000000,
+        0x7F,
+        "SLG47004_default.hex",
+        [RESET_BYTE_ADDR, ERASE_BYTE_ADDR],
+        False,
     ),
 ]
 
@@ -114,3 +168,103 @@ def device_type_descriptor(device_type: str) -> DeviceTypeDescriptor:
     :rtype: DeviceTypeDescriptor
     """
     return copy.deepcopy(__DEVICE_DICT[device_type])
+
+
+def control_code_config_byte(control_code_spec: str) -> int:
+    """Computes the control code configuration byte of a control code spec.
+
+    :param control_code_spec: A string of length 4 where each of the chars is one of '0', '1' and 'X',
+        for internal zero, internal one, or external from the corresponding control code pin.
+    :type control_code_spec: str
+
+    :returns: The value of the control code configuration byte.
+    :rtype: int
+    """
+    assert isinstance(control_code_spec, str)
+    assert re.match(r"^[01X]{4}$", control_code_spec), control_code_spec
+    # By default all bits are internal and zero.
+    control_byte = 0b00000000
+    for i in range(4):
+        c = control_code_spec[i]
+        if c == "1":
+            # Set bit internal value to 1.
+            control_byte |= 1 << (3 - i)
+        elif c == "X":
+            # Set bit selection to external.
+            control_byte |= 1 << (7 - i)
+    return control_byte
+
+
+class ControlCodeVariant:
+    """A variant of a base configuration with a different control code.
+
+    Variants of the same base share the base bytes and hold only their control code page.
+
+    :param control_code_spec: The control code spec of the variant.
+    :type control_code_spec: str
+
+    :param base_image: The 256 bytes base configuration.
+    :type base_image: bytes
+
+    :param page_index: The index of the NVM page that contains the control code byte.
+    :type page_index: int
+
+    :param page_data: The 16 bytes of the variant's control code page.
+    :type page_data: bytes
+    """
+
+    def __init__(
+        self, control_code_spec: str, base_image: bytes, page_index: int, page_data: bytes
+    ):
+        assert len(base_image) == 256
+        assert 0 <= page_index <= 15
+        assert len(page_data) == 16
+        self.control_code_spec: str = control_code_spec
+        self.base_image: bytes = base_image
+        self.page_index: int = page_index
+        self.page_data: bytes = page_data
+        # The pages that differ from the base, keyed by page index. Programming a device
+        # that already has the base configuration needs to program only these pages.
+        self.dirty_pages: Dict[int, bytes] = (
+            {}
+            if page_data == base_image[page_index << 4 : (page_index + 1) << 4]
+            else {page_index: page_data}
+        )
+
+    def image(self) -> bytes:
+        """Returns the full 256 bytes configuration of the variant."""
+        start = self.page_index << 4
+        return self.base_image[:start] + self.page_data + self.base_image[start + 16 :]
+
+
+def control_code_variants(
+    device_type: str, base_image: bytearray | bytes, control_code_specs: List[str]
+) -> List[ControlCodeVariant]:
+    """Generates variants of a configuration with different control codes.
+
+    This is the batch, driver independent, equivalent of ``GreenpakDriver.adjust_control_code()``.
+
+    :param device_type: The id of a supported device, such as ``"SLG46826"``, which determines the
+        address of the control code byte.
+    :type device_type: str
+
+    :param base_image: The 256 bytes base configuration. It's not modified.
+    :type base_image: bytearray or bytes
+
+    :param control_code_specs: The control code specs of the variants, such as ``"00XX"``.
+    :type control_code_specs: List[str]
+
+    :returns: A variant per spec, in the same order.
+    :rtype: List[ControlCodeVariant]
+    """
+    assert len(base_image) == 256
+    control_code_addr = __DEVICE_DICT[device_type].control_code_addr
+    page_index = control_code_addr // 16
+    base = bytes(base_image)
+    base_page = base[page_index << 4 : (page_index + 1) << 4]
+    result = []
+    for spec in control_code_specs:
+        page_data = bytearray(base_page)
+        page_data[control_code_addr % 16] = control_code_config_byte(spec)
+        result.append(ControlCodeVariant(spec, base, page_index, bytes(page_data)))
+    return result
@@ -5,16 +5,38 @@
 # https://www.renesas.com/us/en/document/mat/slg47004-system-programming-guide?r=1572991
 
 from greenpak.i2c import GreenPakI2cInterface
+from greenpak.journal import ProgrammingJournal
+from greenpak.timing import TimingProfile
+from greenpak.snapshot import DeviceSnapshot
+from greenpak.image import GreenpakImage, image_data
+import greenpak.timing as timing
 import greenpak.devices as devices
 from enum import Enum
-from typing import Optional, List, Tuple, Set
+from typing import Optional, List, Tuple, Set, Dict, Callable, Any, Sequence
 import time
 import re
+import threading
 from importlib import resources as impresources
 
 import greenpak.utils as utils
 
 
+# The default timings. The driver uses the timing profile of its device type.
+from greenpak.timing import ERASE_WAIT_SECS, WRITE_WAIT_SECS, RESET_WAIT_SECS
+
+# The min time that reset_device() waits for the device to respond after a reset. The
+# default timeout is the larger of this and 10 times the reset_secs of the timing profile.
+RESET_TIMEOUT_SECS: float = 1.0
+
+# The time between polls of reset_device().
+RESET_POLL_SECS: float = 0.001
+
+# The min time after a reset command before reset_device() accepts a response, unless the
+# device was seen not responding earlier, so that a response from before the reset is not
+# taken as the end of the reset.
+RESET_MIN_SECS: float = 0.005
+
+
 class _MemorySpace(Enum):
     """The four memory spaces of a GreenPak."""
 
@@ -24,6 +46,107 @@ class _MemorySpace(Enum):
     UNUSED = 4
 
 
+# The I2C address bits of each memory space.
+_MEMORY_SPACE_BITS = {
+    _MemorySpace.REGISTER: 0b000,
+    _MemorySpace.NVM: 0b010,
+    _MemorySpace.EEPROM: 0b011,
+    _MemorySpace.UNUSED: 0b100,
+}
+
+
+def _coalesce_spans(
+    addresses: List[int],
+    cost_model: Tuple[float, float],
+    barriers: Set[int] | frozenset = frozenset(),
+    max_gap: int = 256,
+) -> List[Tuple[int, int]]:
+    """Groups sorted, unique addresses into (start_address, n) spans. Neighbor addresses
+    share a span if transferring the bytes between them costs no more than an additional
+    transaction, per a (transaction_secs, byte_secs) cost model. Gaps larger than
+    ``max_gap`` are not bridged, and barrier addresses are neither bridged nor share a
+    span with other addresses."""
+    transaction_secs, byte_secs = cost_model
+    spans: List[Tuple[int, int]] = []
+    for address in addresses:
+        if spans:
+            start, n = spans[-1]
+            end = start + n
+            gap = address - end
+            if (
+                gap <= max_gap
+                and gap * byte_secs <= transaction_secs
+                and end - 1 not in barriers
+                and not barriers.intersection(range(end, address + 1))
+            ):
+                spans[-1] = (start, address - start + 1)
+                continue
+        spans.append((address, 1))
+    return spans
+
+
+class GreenpakError(Exception):
+    """Base class of the errors raised by the GreenPak driver when an operation fails."""
+
+
+class GreenpakI2cError(GreenpakError):
+    """An I2C transaction failed, e.g. the device didn't acknowledge or returned too few bytes."""
+
+
+class GreenpakVerifyError(GreenpakError):
+    """A NVM or EEPROM page didn't read back as expected after an erase or a write."""
+
+
+class RetryPolicy:
+    """A policy for retrying failed operations.
+
+    :param max_attempts: The max number of attempts, including the first one. 1 disables retries.
+    :type max_attempts: int
+
+    :param backoff_secs: The delay before the first retry, in seconds.
+    :type backoff_secs: float
+
+    :param backoff_factor: The multiplier of the delay for each subsequent retry.
+    :type backoff_factor: float
+
+    :param max_backoff_secs: The max delay between retries, in seconds.
+    :type max_backoff_secs: float
+
+    :param transient_errors: The exception types that are retried. Other errors are raised
+        immediately.
+    :type transient_errors: Tuple[type, ...]
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_secs: float = 0.01,
+        backoff_factor: float = 2.0,
+        max_backoff_secs: float = 0.5,
+        transient_errors: Tuple[type, ...] = (GreenpakI2cError, GreenpakVerifyError),
+    ):
+        assert isinstance(max_attempts, int)
+        assert max_attempts >= 1
+        assert backoff_secs >= 0
+        assert backoff_factor >= 1
+        assert max_backoff_secs >= 0
+        assert isinstance(transient_errors, tuple)
+        for error_type in transient_errors:
+            assert issubclass(error_type, Exception), error_type
+        self.max_attempts: int = max_attempts
+        self.backoff_secs: float = backoff_secs
+        self.backoff_factor: float = backoff_factor
+        self.max_backoff_secs: float = max_backoff_secs
+        self.transient_errors: Tuple[type, ...] = transient_errors
+
+    def backoff(self, retry_index: int) -> float:
+        """Returns the delay in seconds before the given retry, starting from zero."""
+        return min(
+            self.backoff_secs * (self.backoff_factor**retry_index),
+            self.max_backoff_secs,
+        )
+
+
 class GreenpakDriver:
     """Creates a GreenPak driver.
 
@@ -48,8 +171,114 @@ class GreenpakDriver:
         assert isinstance(device_control_code, int)
         assert 0 <= device_control_code <= 15
         self.__i2c: GreenPakI2cInterface = i2c_driver
+        # Serializes device operations, e.g. of a background NVM commit and of the caller.
+        self.__lock = threading.RLock()
+        # A reusable buffer for single byte reads.
+        self.__byte_buffer = bytearray(1)
         self.set_device_type(device_type)
         self.set_device_control_code(device_control_code)
+        self.set_retry_policies(RetryPolicy(max_attempts=3), RetryPolicy(max_attempts=3))
+        self.reset_retry_counters()
+        self.set_journal(None)
+        self.set_skip_erase(False)
+
+    def set_skip_erase(self, enabled: bool) -> None:
+        """Enables or disables the skip erase mode of NVM and EEPROM page programming.
+
+        By default, a page is erased to all zeros before it's written. In skip erase mode, if
+        the new page data only changes 0 bits to 1 bits, the page is written without an
+        erase, and is then verified as usual. If the verification fails, e.g. because the
+        device doesn't support this write semantics, the page is erased and written
+        normally. This mode saves an erase cycle of pages that are only appended to.
+
+        :param enabled: True to enable the skip erase mode.
+        :type enabled: bool
+
+        :returns: None
+        """
+        assert isinstance(enabled, bool)
+        self.__skip_erase = enabled
+
+    def get_skip_erase(self) -> bool:
+        """Returns True if the skip erase mode is enabled."""
+        return self.__skip_erase
+
+    def set_journal(self, journal: Optional[ProgrammingJournal]) -> None:
+        """Sets an optional journal of programmed pages.
+
+        With a journal, a ``program_nvm_pages()`` or ``program_eeprom_pages()`` run that was
+        interrupted can be rerun with the same data and will skip the pages that were already
+        programmed, after confirming them with a single bulk read. Since the journal is
+        specific to a device, use a separate journal per adapter and control code, e.g.
+        with ``ProgrammingJournal.for_device()``.
+
+        :param journal: The journal to use, or None to disable journaling.
+        :type journal: ProgrammingJournal
+
+        :returns: None
+        """
+        assert journal is None or isinstance(journal, ProgrammingJournal)
+        self.__journal = journal
+
+    def set_retry_policies(
+        self, transaction_policy: RetryPolicy, page_policy: RetryPolicy
+    ) -> None:
+        """Sets the policies for retrying failed operations.
+
+        By default, I2C transactions and page programming are attempted up to 3 times.
+        Errors that are not retried, or that persist after the last attempt, are raised as
+        a ``GreenpakError``.
+
+        :param transaction_policy: The policy for a single I2C read or write.
+        :type transaction_policy: RetryPolicy
+
+        :param page_policy: The policy for the erase, write and verify of a single NVM or
+            EEPROM page. These operations are executed as a single batch, so a failed
+            transaction of the batch is retried by retrying the page.
+        :type page_policy: RetryPolicy
+
+        :returns: None
+        """
+        assert isinstance(transaction_policy, RetryPolicy)
+        assert isinstance(page_policy, RetryPolicy)
+        self.__transaction_policy = transaction_policy
+        self.__page_policy = page_policy
+
+    def get_retry_counters(self) -> Dict[str, int]:
+        """Returns the retry counters since the driver was created or the counters were reset.
+
+        :returns: A dict with the counts of ``"transaction_retries"`` and ``"page_retries"``,
+            as well as of ``"transaction_failures"`` and ``"page_failures"`` that were raised
+            after the last attempt.
+        :rtype: Dict[str, int]
+        """
+        return dict(self.__retry_counters)
+
+    def reset_retry_counters(self) -> None:
+        """Resets the counters returned by ``get_retry_counters()`` to zero."""
+        self.__retry_counters: Dict[str, int] = {
+            "transaction_retries": 0,
+            "transaction_failures": 0,
+            "page_retries": 0,
+            "page_failures": 0,
+        }
+
+    def __with_retries(
+        self, policy: RetryPolicy, kind: str, func: Callable[..., Any], *args
+    ) -> Any:
+        """Calls func(*args), retrying transient errors per the given policy. ``kind`` is
+        the prefix of the retry counters to update."""
+        for attempt in range(policy.max_attempts):
+            try:
+                with self.__lock:
+                    return func(*args)
+            except policy.transient_errors as e:
+                if attempt + 1 >= policy.max_attempts:
+                    self.__retry_counters[f"{kind}_failures"] += 1
+                    raise
+                self.__retry_counters[f"{kind}_retries"] += 1
+                print(f"{e} Retrying {kind}.", flush=True)
+                time.sleep(policy.backoff(attempt))
 
     def set_device_control_code(self, device_control_code: int) -> None:
         """Sets the control code of the target GreenPAK device.
@@ -62,6 +291,11 @@ class GreenpakDriver:
         assert isinstance(device_control_code, int)
         assert 0 <= device_control_code <= 15
         self.__device_control_code = device_control_code
+        # Precomputed I2C addresses of the memory spaces of this control code.
+        self.__space_addrs = {
+            memory_space: self.__i2c_device_addr(memory_space, device_control_code)
+            for memory_space in _MemorySpace
+        }
 
     def get_device_control_code(self) -> int:
         """Returns the currently set device control code."""
@@ -77,6 +311,38 @@ class GreenpakDriver:
         assert isinstance(device_type, str)
         self.__device_type_descriptor = devices.device_type_descriptor(device_type)
 
+    def clone(self) -> "GreenpakDriver":
+        """Returns a new driver of the same device, with the same I2C driver, device type,
+        control code, retry policies, skip erase mode and journal. The drivers share the
+        lock that serializes their device operations, but have separate settings and retry
+        counters, so later changes of one driver, e.g. of its control code, don't affect
+        the other. Used to hand a device to a background operation.
+
+        :returns: The new driver.
+        :rtype: GreenpakDriver
+        """
+        with self.__lock:
+            other = GreenpakDriver(
+                self.__i2c,
+                self.__device_type_descriptor.device_type,
+                self.__device_control_code,
+            )
+            other.__lock = self.__lock
+            other.set_retry_policies(self.__transaction_policy, self.__page_policy)
+            other.set_journal(self.__journal)
+            other.set_skip_erase(self.__skip_erase)
+        return other
+
+    def get_i2c_driver(self) -> GreenPakI2cInterface:
+        """Returns the I2C driver that this driver uses."""
+        return self.__i2c
+
+    def get_timing_profile(self) -> TimingProfile:
+        """Returns the timing profile that the driver uses, which is the profile registered
+        for its device type with ``greenpak.timing.set_timing_profile()``, or the default
+        timings if none is registered."""
+        return timing.get_timing_profile(self.__device_type_descriptor.device_type)
+
     def get_device_type(self) -> str:
         """Returns the currently set device type. Note that this does not actually retrive the device
         type from the device but only retrieve the attribute of this driver. As of Jan 2024, Renesas
@@ -94,15 +360,9 @@ class GreenpakDriver:
             _MemorySpace.UNUSED,
         )
         if control_code is None:
-            control_code = self.__device_control_code
-        assert 0 <= control_code << 15
-        memory_space_table = {
-            _MemorySpace.REGISTER: 0b000,
-            _MemorySpace.NVM: 0b010,
-            _MemorySpace.EEPROM: 0b011,
-            _MemorySpace.UNUSED: 0b100,
-        }
-        device_i2c_addr = control_code << 3 | memory_space_table[memory_space]
+            return self.__space_addrs[memory_space]
+        assert 0 <= control_code <= 15
+        device_i2c_addr = control_code << 3 | _MEMORY_SPACE_BITS[memory_space]
         assert 0 <= device_i2c_addr <= 127
         return device_i2c_addr
 
@@ -110,23 +370,51 @@ class GreenpakDriver:
         self, memory_space: _MemorySpace, start_address: int, n: int
     ) -> bytearray:
         """Read a block of bytes from the given memory space."""
+        result = bytearray(n)
+        self.__read_bytes_into(memory_space, start_address, result)
+        return result
+
+    def __read_bytes_into(
+        self,
+        memory_space: _MemorySpace,
+        start_address: int,
+        buffer: bytearray | memoryview,
+    ) -> None:
+        """Read a block of ``len(buffer)`` bytes from the given memory space into the buffer."""
         assert memory_space in (
             _MemorySpace.REGISTER,
             _MemorySpace.NVM,
             _MemorySpace.EEPROM,
         )
+        n = len(buffer)
         assert 0 <= start_address <= 255
         assert 0 < n
         assert start_address + n <= 256
 
-        # Construct the i2c address.
-        device_i2c_addr = self.__i2c_device_addr(memory_space)
-
-        resp_bytes = self.__i2c.gp_read(device_i2c_addr, start_address, n)
+        self.__with_retries(
+            self.__transaction_policy,
+            "transaction",
+            self.__read_bytes_into_once,
+            memory_space,
+            self.__space_addrs[memory_space],
+            start_address,
+            buffer,
+        )
 
-        assert resp_bytes is not None
-        assert n == len(resp_bytes)
-        return resp_bytes
+    def __read_bytes_into_once(
+        self,
+        memory_space: _MemorySpace,
+        device_i2c_addr: int,
+        start_address: int,
+        buffer: bytearray | memoryview,
+    ) -> None:
+        """A single attempt of __read_bytes_into()."""
+        ok = self.__i2c.gp_read_into(device_i2c_addr, start_address, buffer)
+        self.__i2c.gp_report_transaction(ok)
+        if not ok:
+            raise GreenpakI2cError(
+                f"Reading {len(buffer)} bytes at {memory_space.name}/0x{start_address:02x} failed."
+            )
 
     def read_register_bytes(self, start_address: int, n: int) -> bytearray:
         """Read a memory block from the REGISTER memory space.
@@ -176,6 +464,108 @@ class GreenpakDriver:
         """
         return self.__read_bytes(_MemorySpace.EEPROM, start_address, n)
 
+    def read_gather(self, memory_space: str, addresses: Sequence[int]) -> bytearray:
+        """Reads scattered bytes of a memory space in as few transactions as worthwhile.
+
+        The addresses are sorted and grouped into spans, and each span is read with a
+        single transaction. Nearby addresses share a span if reading the bytes between them
+        is cheaper than an additional transaction, per the ``gp_cost_model()`` of the I2C
+        driver.
+
+        :param memory_space: ``"REGISTER"``, ``"NVM"`` or ``"EEPROM"``.
+        :type memory_space: str
+
+        :param addresses: The addresses to read, each in the range [0, 255], in any order
+            and possibly with duplicates.
+        :type addresses: Sequence[int]
+
+        :returns: The bytes read, such that ``result[i]`` is the byte at ``addresses[i]``.
+        :rtype: bytearray
+        """
+        assert memory_space in ("REGISTER", "NVM", "EEPROM")
+        space = _MemorySpace[memory_space]
+        for address in addresses:
+            assert 0 <= address <= 255
+        spans = _coalesce_spans(sorted(set(addresses)), self.__i2c.gp_cost_model())
+        data = bytearray(256)
+        with memoryview(data) as view:
+            for start, n in spans:
+                self.__read_bytes_into(space, start, view[start : start + n])
+        return bytearray(data[address] for address in addresses)
+
+    def snapshot(self) -> DeviceSnapshot:
+        """Reads the REGISTER, NVM and EEPROM spaces of the device.
+
+        The three spaces are read with one full space read each, issued as a single
+        ``gp_batch()``, which remote I2C drivers execute with a single round trip. If the
+        batch fails, the spaces are read again with the usual retries.
+
+        :returns: An immutable snapshot of the device.
+        :rtype: greenpak.snapshot.DeviceSnapshot
+        """
+        memory_spaces = (_MemorySpace.REGISTER, _MemorySpace.NVM, _MemorySpace.EEPROM)
+        ops = [("read", self.__space_addrs[space], 0, 256) for space in memory_spaces]
+        with self.__lock:
+            results = self.__i2c.gp_batch(ops)
+        for result in results:
+            self.__i2c.gp_report_transaction(result is not None)
+        if len(results) != len(ops) or any(
+            result is None or len(result) != 256 for result in results
+        ):
+            results = [self.__read_bytes(space, 0, 256) for space in memory_spaces]
+        return DeviceSnapshot(
+            self.__device_type_descriptor.device_type,
+            self.__device_control_code,
+            time.time(),
+            bytes(results[0]),
+            bytes(results[1]),
+            bytes(results[2]),
+        )
+
+    def read_register_into(
+        self, start_address: int, buffer: bytearray | memoryview
+    ) -> None:
+        """Read a block of bytes from the REGISTER memory space into a caller supplied buffer.
+
+        Same as ``read_register_bytes()`` with ``n = len(buffer)``, but doesn't allocate the
+        result, which is useful in tight polling loops. The buffer can be a ``memoryview``
+        slice of a larger buffer.
+
+        :param start_address: The address of the first byte to read. Should be in the
+            range [0, 255].
+        :type start_address: int
+
+        :param buffer: A writable buffer of 1 to 256 bytes.
+        :type buffer: bytearray or memoryview
+
+        :returns: None
+        """
+        self.__read_bytes_into(_MemorySpace.REGISTER, start_address, buffer)
+
+    def read_nvm_into(self, start_address: int, buffer: bytearray | memoryview) -> None:
+        """Same as ``read_register_into()`` but for the NVM memory space."""
+        self.__read_bytes_into(_MemorySpace.NVM, start_address, buffer)
+
+    def read_eeprom_into(
+        self, start_address: int, buffer: bytearray | memoryview
+    ) -> None:
+        """Same as ``read_register_into()`` but for the EEPROM memory space."""
+        self.__read_bytes_into(_MemorySpace.EEPROM, start_address, buffer)
+
+    def read_register_byte(self, address: int) -> int:
+        """Read a single byte from the REGISTER memory space.
+
+        :param address: The address of the byte to read. Should be in the range [0, 255].
+        :type address: int
+
+        :returns: The byte value.
+        :rtype: int
+        """
+        # The lock guards the shared byte buffer against concurrent callers.
+        with self.__lock:
+            self.__read_bytes_into(_MemorySpace.REGISTER, address, self.__byte_buffer)
+            return self.__byte_buffer[0]
+
     def __is_page_writeable(self, memory_space: _MemorySpace, page_index: int) -> bool:
         """Returns true if the page is writable by the user."""
         assert memory_space in (_MemorySpace.NVM, _MemorySpace.EEPROM), memory_space
@@ -186,6 +576,23 @@ class GreenpakDriver:
         ) and page_index in self.__device_type_descriptor.ro_nvm_pages
         return not read_only
 
+    def __image_data(
+        self, data: bytes | bytearray | GreenpakImage, memory_space: _MemorySpace
+    ) -> bytes | bytearray:
+        """Returns the bytes of an image or of raw bytes. Images must be of the device type
+        of the driver, or of an unknown device type, and of a memory space with the layout
+        of the given memory space. The REGISTER and NVM spaces have the same layout."""
+        if isinstance(data, GreenpakImage):
+            assert data.device_type in (
+                "",
+                self.__device_type_descriptor.device_type,
+            ), f"Image of {data.device_type} for a {self.__device_type_descriptor.device_type} device"
+            is_config = memory_space in (_MemorySpace.REGISTER, _MemorySpace.NVM)
+            assert (data.memory_space in ("REGISTER", "NVM")) == is_config, (
+                f"{data.memory_space} image for the {memory_space.name} space"
+            )
+        return image_data(data)
+
     def __write_bytes(
         self, memory_space: _MemorySpace, start_address: int, data: bytearray
     ) -> None:
@@ -212,9 +619,31 @@ class GreenpakDriver:
         # Construct the device i2c address
         device_i2c_addr = self.__i2c_device_addr(memory_space)
 
+        self.__with_retries(
+            self.__transaction_policy,
+            "transaction",
+            self.__write_bytes_once,
+            memory_space,
+            device_i2c_addr,
+            start_address,
+            data,
+        )
+
+    def __write_bytes_once(
+        self,
+        memory_space: _MemorySpace,
+        device_i2c_addr: int,
+        start_address: int,
+        data: bytearray,
+    ) -> None:
+        """A single attempt of __write_bytes()."""
         # We write the start address followed by the data bytes
         ok = self.__i2c.gp_write(device_i2c_addr, start_address, data)
-        assert ok
+        self.__i2c.gp_report_transaction(ok)
+        if not ok:
+            raise GreenpakI2cError(
+                f"Writing {len(data)} bytes at {memory_space.name}/0x{start_address:02x} failed."
+            )
 
     def __read_page(self, memory_space: _MemorySpace, page_index: int) -> bool:
         """Read a 16 bytes page of a NVM or EEPROM memory spaces."""
@@ -239,17 +668,9 @@ class GreenpakDriver:
 
         # Erase.
         print(f"Erasing page {memory_space.name}/{page_index:02d}.", flush=True)
-        # We erase by writing to the register ERSR byte, and waiting.
-        space_mask = {_MemorySpace.NVM: 0x00, _MemorySpace.EEPROM: 0x10}[memory_space]
-        erase_mask = (
-            self.__device_type_descriptor.erase_byte_mask | space_mask | page_index
-        )
-        # TODO: Find a cleaner solution for the errata's workaround.
-        self.write_register_bytes(
-            self.__device_type_descriptor.erase_byte_addr, bytearray([erase_mask])
-        )
-        # Allow the operation to complete. Datasheet says 20ms max.
-        time.sleep(0.025)
+        self.__write_erase_byte(memory_space, page_index)
+        # Allow the operation to complete.
+        time.sleep(self.get_timing_profile().erase_secs)
 
         # Errata woraround. Perform a dummy write to clear the error from the previous write.
         # This is a workaround for the erase issue describe in the errata at:
@@ -258,7 +679,29 @@ class GreenpakDriver:
         # self.__i2c.gp_write(device_i2c_addr, 0, bytearray([0]))
 
         # Verify that the page is all zeros.
-        assert self.__is_page_erased(memory_space, page_index)
+        erased = self.__is_page_erased(memory_space, page_index)
+        self.__i2c.gp_report_transaction(erased)
+        if not erased:
+            raise GreenpakVerifyError(
+                f"Page {memory_space.name}/{page_index:02d} not erased."
+            )
+
+    def __write_erase_byte(self, memory_space: _MemorySpace, page_index: int) -> None:
+        """Starts the erase of a page by writing to the register ERSR byte. Per the device
+        errata, the device may NACK this write even though the erase proceeds, so the write
+        is not retried and its status is ignored. Callers verify the erase by reading back
+        the page."""
+        with self.__lock:
+            self.__i2c.gp_write(
+                self.__space_addrs[_MemorySpace.REGISTER],
+                self.__device_type_descriptor.erase_byte_addr,
+                bytearray([self.__erase_mask(memory_space, page_index)]),
+            )
+
+    def __erase_mask(self, memory_space: _MemorySpace, page_index: int) -> int:
+        """Returns the value to write to the erase byte to erase the given page."""
+        space_mask = {_MemorySpace.NVM: 0x00, _MemorySpace.EEPROM: 0x10}[memory_space]
+        return self.__device_type_descriptor.erase_byte_mask | space_mask | page_index
 
     def __is_page_erased(self, memory_space: _MemorySpace, page_index: int) -> bool:
         """Returns true if all 16 bytes of given MVM or EEPROM page are zero.
@@ -277,6 +720,19 @@ class GreenpakDriver:
         assert memory_space in (_MemorySpace.NVM, _MemorySpace.EEPROM)
         assert self.__is_page_writeable(memory_space, page_index)
         assert len(page_data) == 16
+        self.__with_retries(
+            self.__page_policy,
+            "page",
+            self.__program_page_once,
+            memory_space,
+            page_index,
+            page_data,
+        )
+
+    def __program_page_once(
+        self, memory_space: _MemorySpace, page_index: int, page_data: bytearray
+    ) -> None:
+        """A single attempt of __program_page()."""
 
         # Do nothing if the page already has the desired value.
         old_data = self.__read_page(memory_space, page_index)
@@ -284,24 +740,138 @@ class GreenpakDriver:
             print(f"Page {memory_space.name}/{page_index:02d} no change.", flush=True)
             return
 
-        # Erase the page to all zeros.
-        self.__erase_page(memory_space, page_index)
-
-        # Write the new page data.
+        # In skip erase mode, if the new data only sets bits, try to write without erasing,
+        # and fall back to an erase if the page doesn't verify. The failed write may have
+        # set bits of a page that was all zeros, so the fallback always erases.
+        erase = any(old_data)
+        if self.__skip_erase and all((o & ~n) == 0 for o, n in zip(old_data, page_data)):
+            print(
+                f"Writing page {memory_space.name}/{page_index:02d} without erase.",
+                flush=True,
+            )
+            self.__write_bytes(memory_space, page_index << 4, page_data)
+            time.sleep(self.get_timing_profile().write_secs)
+            if self.__read_page(memory_space, page_index) == page_data:
+                return
+            print(
+                f"Page {memory_space.name}/{page_index:02d} write without erase failed.",
+                flush=True,
+            )
+            erase = True
+
+        # Erase the page to all zeros, unless already erased, write the new page data and
+        # verify it. This is done as a single batch of I2C operations, which remote I2C
+        # drivers execute with a single round trip.
+        timing_profile = self.get_timing_profile()
+        erase_ops, erase_verify_ops, write_ops, write_verify_ops = self.page_program_ops(
+            memory_space.name, page_index, page_data, erase
+        )
+        ops = []
+        if erase_ops:
+            print(f"Erasing page {memory_space.name}/{page_index:02d}.", flush=True)
+            ops.extend(erase_ops)
+            ops.append(("sleep", timing_profile.erase_secs))
+            ops.extend(erase_verify_ops)
+        else:
+            print(
+                f"Page {memory_space.name}/{page_index:02d} already erased.", flush=True
+            )
         print(f"Writing page {memory_space.name}/{page_index:02d}.", flush=True)
-        self.__write_bytes(memory_space, page_index << 4, page_data)
-        # Allow the operation to complete. Datasheet says 20ms max.
-        time.sleep(0.025)
+        ops.extend(write_ops)
+        ops.append(("sleep", timing_profile.write_secs))
+        ops.extend(write_verify_ops)
+        with self.__lock:
+            results = self.__i2c.gp_batch(ops)
+        # The erase write is excluded from the auto speed statistics since devices may NACK
+        # it even when the erase succeeds. The erase verification tells the outcome.
+        for op, result in zip(ops, results):
+            if op[0] not in ("sleep", "write_ignore"):
+                self.__i2c.gp_report_transaction(bool(result))
+        if len(results) < len(ops) or not results[-1]:
+            failed_index = len(results) - 1
+            # The index of the first write operation, after the erase operations if any.
+            write_index = len(ops) - 3
+            if failed_index < write_index:
+                raise GreenpakVerifyError(
+                    f"Page {memory_space.name}/{page_index:02d} not erased."
+                )
+            if failed_index == write_index:
+                raise GreenpakI2cError(
+                    f"Writing page {memory_space.name}/{page_index:02d} failed."
+                )
+            raise GreenpakVerifyError(
+                f"Page {memory_space.name}/{page_index:02d} verification failed."
+            )
+
+    def page_program_ops(
+        self, memory_space: str, page_index: int, page_data: bytes | bytearray, erase: bool
+    ) -> Tuple[List[Tuple], List[Tuple], List[Tuple], List[Tuple]]:
+        """Returns the ``GreenPakI2cInterface.gp_batch()`` operations that program a NVM or
+        EEPROM page, without the waits between them.
+
+        This is a low level method for interleaving the programming of several devices on
+        the same bus. The erase operations should be followed by a wait of the
+        ``erase_secs`` of the timing profile before the erase verification, and the write
+        operations by a wait of its ``write_secs`` before the write verification. Unlike
+        ``program_nvm_pages()`` and ``program_eeprom_pages()``, nothing is retried. The erase
+        operation is a ``"write_ignore"`` since devices may NACK it even when the erase
+        succeeds, so its result should be ignored in favor of the erase verification.
+
+        :param memory_space: ``"NVM"`` or ``"EEPROM"``.
+        :type memory_space: str
 
-        # Read and verify the page's content.
-        actual_page_data = self.__read_page(memory_space, page_index)
-        assert actual_page_data == page_data
+        :param page_index: The index of a writeable page, in the range [0, 15].
+        :type page_index: int
+
+        :param page_data: The 16 bytes of the page.
+        :type page_data: bytes | bytearray
+
+        :param erase: True if the page needs to be erased, i.e. is not all zeros.
+        :type erase: bool
+
+        :returns: A tuple of (erase_ops, erase_verify_ops, write_ops, write_verify_ops). The
+            erase lists are empty if ``erase`` is False.
+        :rtype: Tuple[List[Tuple], List[Tuple], List[Tuple], List[Tuple]]
+        """
+        assert memory_space in ("NVM", "EEPROM")
+        space = _MemorySpace[memory_space]
+        assert self.__is_page_writeable(space, page_index)
+        assert len(page_data) == 16
+        device_i2c_addr = self.__space_addrs[space]
+        erase_ops = []
+        erase_verify_ops = []
+        if erase:
+            # Some devices NACK the erase byte write even though the erase succeeds, so
+            # its failure doesn't stop the batch and the erase verification decides.
+            erase_ops.append(
+                (
+                    "write_ignore",
+                    self.__space_addrs[_MemorySpace.REGISTER],
+                    self.__device_type_descriptor.erase_byte_addr,
+                    bytearray([self.__erase_mask(space, page_index)]),
+                )
+            )
+            erase_verify_ops.append(
+                ("expect", device_i2c_addr, page_index << 4, bytearray(16))
+            )
+        write_ops = [("write", device_i2c_addr, page_index << 4, page_data)]
+        write_verify_ops = [("expect", device_i2c_addr, page_index << 4, page_data)]
+        return (erase_ops, erase_verify_ops, write_ops, write_verify_ops)
 
     def __program_pages(
-        self, memory_space: _MemorySpace, start_page_index: int, pages_data: bytearray
+        self,
+        memory_space: _MemorySpace,
+        start_page_index: int,
+        pages_data: bytearray | GreenpakImage,
     ) -> None:
         """Program one or mage 16 bytes pages of the NVM or EEPROM spaces."""
         assert memory_space in (_MemorySpace.NVM, _MemorySpace.EEPROM)
+        # The pages of an image are sliced once and cached by the image.
+        if isinstance(pages_data, GreenpakImage):
+            pages = pages_data.pages()
+        else:
+            pages = None
+        pages_data = self.__image_data(pages_data, memory_space)
         assert 0 <= start_page_index <= 15
         assert 1 < len(pages_data)
         assert (len(pages_data) % 16) == 0
@@ -310,21 +880,61 @@ class GreenpakDriver:
         num_pages = len(pages_data) // 16
         assert 0 < num_pages
         assert start_page_index + num_pages <= 16
+
+        # If a journal is set, skip the pages that a previous interrupted run of the
+        # same image recorded and that a single bulk read confirms.
+        journal = self.__journal
+        confirmed_pages: Set[int] = set()
+        if journal is not None:
+            image_hash = journal.image_hash(
+                memory_space.name, start_page_index, pages_data
+            )
+            recorded_pages = journal.completed_pages(memory_space.name, image_hash)
+            if recorded_pages:
+                actual_data = self.__read_bytes(
+                    memory_space, start_page_index << 4, len(pages_data)
+                )
+                for page_index in recorded_pages:
+                    i = page_index - start_page_index
+                    page_slice = slice(i << 4, (i + 1) << 4)
+                    if actual_data[page_slice] == pages_data[page_slice]:
+                        confirmed_pages.add(page_index)
+                print(
+                    f"Journal confirmed {len(confirmed_pages)} {memory_space.name} pages.",
+                    flush=True,
+                )
+
         for i in range(0, num_pages):
-            if not self.__is_page_writeable(memory_space, i):
+            page_index = start_page_index + i
+            if not self.__is_page_writeable(memory_space, page_index):
+                print(
+                    f"Page {memory_space.name}/{page_index} a read-only page, skipping.",
+                    flush=True,
+                )
+            elif page_index in confirmed_pages:
                 print(
-                    f"Page {memory_space.name}/{i} a read-only page, skipping.",
+                    f"Page {memory_space.name}/{page_index:02d} confirmed by journal.",
                     flush=True,
                 )
             else:
-                page_data = pages_data[i << 4 : (i + 1) << 4]
-                self.__program_page(memory_space, start_page_index + i, page_data)
-
-    def write_register_bytes(self, start_address: int, data: bytearray) -> None:
+                if pages is not None:
+                    page_data = pages[i]
+                else:
+                    page_data = pages_data[i << 4 : (i + 1) << 4]
+                self.__program_page(memory_space, page_index, page_data)
+                if journal is not None:
+                    journal.record_page(memory_space.name, image_hash, page_index)
+
+        if journal is not None:
+            journal.clear(memory_space.name, image_hash)
+
+    def write_register_bytes(
+        self, start_address: int, data: bytearray | GreenpakImage
+    ) -> None:
         """Write a block of bytes to device's REGISTER memory space.
 
-        The method writes the bytes to the device and asserts that the operation was
-        successful.
+        The method writes the bytes to the device and raises a ``GreenpakError`` if the
+        operation failed.
 
         :param start_address: The address of the first byte to write. Should be in the
             range [0, 255].
@@ -332,66 +942,354 @@ class GreenpakDriver:
 
         :param data: The bytes to write. ``len(data)`` should be in the range [0, 256] and should
             not exceed the device memory limit.
-        :type data: int
+        :type data: bytearray | GreenpakImage
 
         :returns: None.
         """
-        self.__write_bytes(_MemorySpace.REGISTER, start_address, data)
+        self.__write_bytes(_MemorySpace.REGISTER, start_address, self.__image_data(data, _MemorySpace.REGISTER))
+
+    def apply_register_patches(
+        self,
+        patches: Sequence[Tuple[int, int]],
+        current_image: Optional[bytes | bytearray | GreenpakImage] = None,
+    ) -> int:
+        """Writes scattered bytes to the REGISTER space in as few transactions as worthwhile.
+
+        The patches are sorted and coalesced into spans, and each span is written with a
+        single transaction. Consecutive addresses always share a span. If ``current_image``
+        is given, small gaps between patches are bridged by rewriting the bytes between them
+        with their values in ``current_image``, when that's cheaper than an additional
+        transaction per the ``gp_cost_model()`` of the I2C driver. Gaps are never bridged
+        across the ``volatile_register_addrs`` of the device type, and patches of these
+        addresses are written with their own transactions. Device types whose
+        ``volatile_register_addrs`` are incomplete never bridge gaps.
+
+        :param patches: A list of (address, value) tuples. Addresses are in the range [0, 255]
+            and values in the range [0, 255]. If an address appears more than once, its last
+            value is written.
+        :type patches: Sequence[Tuple[int, int]]
+
+        :param current_image: The known current 256 bytes of the REGISTER space, or None to
+            write only the patched bytes.
+        :type current_image: bytes | bytearray | GreenpakImage | None
+
+        :returns: The number of write transactions.
+        :rtype: int
+        """
+        values: Dict[int, int] = {}
+        for address, value in patches:
+            assert 0 <= address <= 255
+            assert 0 <= value <= 255
+            values[address] = value
+        if current_image is not None:
+            current_image = self.__image_data(current_image, _MemorySpace.REGISTER)
+            assert len(current_image) == 256
+            data = bytearray(current_image)
+            # A bridged gap may rewrite status bytes that the descriptor doesn't list.
+            max_gap = 256 if self.__device_type_descriptor.volatile_register_addrs_complete else 0
+        else:
+            data = bytearray(256)
+            max_gap = 0
+        for address, value in values.items():
+            data[address] = value
+        spans = _coalesce_spans(
+            sorted(values.keys()),
+            self.__i2c.gp_cost_model(),
+            set(self.__device_type_descriptor.volatile_register_addrs),
+            max_gap,
+        )
+        for start, n in spans:
+            self.__write_bytes(_MemorySpace.REGISTER, start, data[start : start + n])
+        return len(spans)
+
+    def load_register_image(
+        self,
+        image: bytes | bytearray | GreenpakImage,
+        current_image: Optional[bytes | bytearray | GreenpakImage] = None,
+        verify: bool = False,
+    ) -> int:
+        """Loads a configuration to the REGISTER space, without programming the NVM.
+
+        The configuration takes effect immediately and lasts until the device is reset or
+        powered off. Only the bytes that differ from the current REGISTER content are written,
+        coalesced into spans as by ``apply_register_patches()``. The
+        ``volatile_register_addrs`` of the device type, such as the erase and reset trigger
+        bytes and live status bytes, are never written, and the control code byte, which
+        would move the device to another I2C address, keeps its current value.
+
+        :param image: The 256 bytes configuration to load, e.g. as returned by
+            ``utils.read_bits_config_file()``.
+        :type image: bytes | bytearray | GreenpakImage
 
-    def program_nvm_pages(self, start_page_index: int, pages_data: bytearray) -> None:
+        :param current_image: The known current 256 bytes of the REGISTER space, e.g. the image
+            loaded by a previous call, or None to read it from the device.
+        :type current_image: bytes | bytearray | GreenpakImage | None
+
+        :param verify: If True, reads back the REGISTER space and raises a
+            ``GreenpakVerifyError`` if a loaded byte doesn't match the image.
+        :type verify: bool
+
+        :returns: The number of write transactions, zero if the configuration was already loaded.
+        :rtype: int
+        """
+        image = self.__image_data(image, _MemorySpace.REGISTER)
+        assert len(image) == 256
+        if current_image is None:
+            current_image = self.read_register_bytes(0, 256)
+        current_image = self.__image_data(current_image, _MemorySpace.REGISTER)
+        assert len(current_image) == 256
+        skipped = set(self.__device_type_descriptor.volatile_register_addrs)
+        skipped.add(self.__device_type_descriptor.control_code_addr)
+        patches = [
+            (address, image[address])
+            for address in range(256)
+            if address not in skipped and image[address] != current_image[address]
+        ]
+        n = self.apply_register_patches(patches, current_image) if patches else 0
+        if verify:
+            actual_image = self.read_register_bytes(0, 256)
+            for address in range(256):
+                if address not in skipped and actual_image[address] != image[address]:
+                    raise GreenpakVerifyError(
+                        f"REGISTER/0x{address:02x} reads 0x{actual_image[address]:02x}, expected 0x{image[address]:02x}."
+                    )
+        return n
+
+    def program_nvm_pages(
+        self, start_page_index: int, pages_data: bytearray | GreenpakImage
+    ) -> None:
         """Program one or more 16 bytes pages of the NVM memory space.
 
         The NVM memory space is made of 16 bytes blocks call pages which are erased and
         updated as a whole. This methods programs one or more conescutive pages in the NVM
-        memory space of the device and asserts that the operation is successful.
+        memory space of the device and raises a ``GreenpakError`` if the operation failed.
 
         :param start_page_index: The index of the first page that should be programmed with
             ``data``. Should be in the range p0, 15]. For example program from byte at address
             32, use the page index 2.
         :type start_page_index: int
 
-        :param pages_data: The bytes to write. ``len(data)`` should be a multiple of 16.
-        :type data: int
+        :param pages_data: The bytes to write. ``len(data)`` should be a multiple of 16. A
+            ``GreenpakImage`` is programmed from page 0.
+        :type pages_data: bytearray | GreenpakImage
 
         :returns: None.
         """
         self.__program_pages(_MemorySpace.NVM, start_page_index, pages_data)
 
     def program_eeprom_pages(
-        self, start_page_index: int, pages_data: bytearray
+        self, start_page_index: int, pages_data: bytearray | GreenpakImage
     ) -> None:
         """Program one or more 16 bytes pages of the EEPROM memory space.
 
         The EEPROM memory space is made of 16 bytes blocks call pages which are erased and
         updated as a whole. This methods programs one or more conescutive pages in the NVM
-        memory space of the device and asserts that the operation is successful.
+        memory space of the device and raises a ``GreenpakError`` if the operation failed.
 
         :param start_page_index: The index of the first page that should be programmed with
             ``data``. Should be in the range p0, 15]. For example program from byte at address
             32, use the page index 2.
         :type start_page_index: int
 
-        :param pages_data: The bytes to write. ``len(data)`` should be a multiple of 16.
-        :type data: int
+        :param pages_data: The bytes to write. ``len(data)`` should be a multiple of 16. A
+            ``GreenpakImage`` is programmed from page 0.
+        :type pages_data: bytearray | GreenpakImage
 
         :returns: None.
         """
         self.__program_pages(_MemorySpace.EEPROM, start_page_index, pages_data)
 
-    def reset_device(self) -> None:
+    def calibrate_timing(
+        self,
+        eeprom_page_index: int = 15,
+        iterations: int = 3,
+        margin: float = 1.5,
+        include_reset: bool = False,
+        register: bool = True,
+    ) -> TimingProfile:
+        """Measures the erase, write and optionally reset times of the device.
+
+        An EEPROM page is erased and written ``iterations`` times, each time polling the
+        page until it reads as expected, and is then restored to its original content. The
+        profile times are the max measured times, multiplied by ``margin``. The measurement
+        includes the latency of the I2C adapter, so a profile is specific to the device
+        type and the adapter that it was measured with.
+
+        :param eeprom_page_index: The index of the EEPROM page to use, in the range [0, 15].
+            The page content is restored but the page is erased and written
+            ``iterations + 1`` times.
+        :type eeprom_page_index: int
+
+        :param iterations: The number of measurements of each operation.
+        :type iterations: int
+
+        :param margin: The factor by which the measured times are multiplied, at least 1.
+        :type margin: float
+
+        :param include_reset: If True, the reset time is also measured, by resetting the
+            device. Otherwise the reset time is taken from the current profile.
+        :type include_reset: bool
+
+        :param register: If True, the profile is registered for the device type with
+            ``greenpak.timing.set_timing_profile()``.
+        :type register: bool
+
+        :returns: The measured profile.
+        :rtype: TimingProfile
+        """
+        assert 0 <= eeprom_page_index <= 15
+        assert iterations > 0
+        assert margin >= 1
+        memory_space = _MemorySpace.EEPROM
+        original_data = self.__read_page(memory_space, eeprom_page_index)
+        zeros = bytearray(16)
+        # Polls time out after 10 times the current profile times.
+        current_profile = self.get_timing_profile()
+        erase_timeout_secs = 10 * current_profile.erase_secs
+        write_timeout_secs = 10 * current_profile.write_secs
+        erase_times = []
+        write_times = []
+        for i in range(iterations):
+            self.__erase_page(memory_space, eeprom_page_index)
+            # Measure an erase of a page with set bits.
+            page_data = bytearray([0x55 if i % 2 else 0xAA] * 16)
+            self.__write_bytes(memory_space, eeprom_page_index << 4, page_data)
+            write_times.append(
+                self.__poll_page(
+                    memory_space, eeprom_page_index, page_data, write_timeout_secs
+                )
+            )
+            self.__write_erase_byte(memory_space, eeprom_page_index)
+            erase_times.append(
+                self.__poll_page(memory_space, eeprom_page_index, zeros, erase_timeout_secs)
+            )
+        reset_secs = current_profile.reset_secs
+        if include_reset:
+            start_time = time.monotonic()
+            self.reset_device()
+            reset_secs = (time.monotonic() - start_time) * margin
+        profile = TimingProfile(
+            self.__device_type_descriptor.device_type,
+            max(erase_times) * margin,
+            max(write_times) * margin,
+            reset_secs,
+        )
+        if register:
+            timing.set_timing_profile(profile)
+        self.__program_page(memory_space, eeprom_page_index, original_data)
+        return profile
+
+    def __poll_page(
+        self,
+        memory_space: _MemorySpace,
+        page_index: int,
+        expected_data: bytearray,
+        timeout_secs: float,
+    ) -> float:
+        """Reads a page until it has the expected data, and returns the elapsed time. Failed
+        reads, e.g. while the device is busy, are ignored."""
+        device_i2c_addr = self.__space_addrs[memory_space]
+        buffer = bytearray(16)
+        start_time = time.monotonic()
+        while True:
+            with self.__lock:
+                ok = self.__i2c.gp_read_into(device_i2c_addr, page_index << 4, buffer)
+            elapsed = time.monotonic() - start_time
+            if ok and buffer == expected_data:
+                return elapsed
+            if elapsed > timeout_secs:
+                raise GreenpakVerifyError(
+                    f"Page {memory_space.name}/{page_index:02d} didn't reach the expected data within {timeout_secs:.3f} secs."
+                )
+
+    def reset_device(
+        self,
+        timeout_secs: Optional[float] = None,
+        expected_control_codes: Optional[Sequence[int]] = None,
+    ) -> int:
         """Reset the device.
 
         Sends a reset command to the device. A reset applies the NVM configuration by copying
         it to the REGISTER spates and brings the device to initial state. Use it after programming
-        the NVM to apply the new configuration. The method asserts that the operation was successful
-
-        :returns: None.
+        the NVM to apply the new configuration.
+
+        The method then waits until the device stops responding or for ``RESET_MIN_SECS``,
+        and polls the device until it responds again, at its current control code and at
+        the ``expected_control_codes``, and the control code of this driver is set to the
+        one that responded. If ``expected_control_codes`` is None and the control code
+        setting of the NVM doesn't allow the current control code, the device is polled at
+        the control codes that the setting allows, except those that respond before the
+        reset, which belong to other devices. The method raises a ``GreenpakError`` if the
+        operation failed or if the device didn't respond within the timeout.
+
+        :param timeout_secs: The max time to wait for the device to respond after the reset,
+            or None for the larger of ``RESET_TIMEOUT_SECS`` and 10 times the ``reset_secs``
+            of the timing profile.
+        :type timeout_secs: float | None
+
+        :param expected_control_codes: The control codes that the device may move to, in
+            addition to its current control code, or None to derive them from the NVM.
+        :type expected_control_codes: Sequence[int] | None
+
+        :returns: The control code of the device after the reset.
+        :rtype: int
         """
+        if timeout_secs is None:
+            timeout_secs = max(
+                RESET_TIMEOUT_SECS, 10 * self.get_timing_profile().reset_secs
+            )
+        assert timeout_secs >= 0
+        current_code = self.__device_control_code
+        if expected_control_codes is not None:
+            for code in expected_control_codes:
+                assert 0 <= code <= 15, code
+            candidates = [current_code] + [
+                code for code in expected_control_codes if code != current_code
+            ]
+        else:
+            # The control codes that the NVM control code setting allows. Bits 7-4 select
+            # external pins and bits 3-0 are the internal values.
+            control_byte = self.read_nvm_bytes(
+                self.__device_type_descriptor.control_code_addr, 1
+            )[0]
+            external_mask = control_byte >> 4
+            internal_value = control_byte & 0x0F & ~external_mask
+            allowed = [
+                code for code in range(16) if code & ~external_mask == internal_value
+            ]
+            if current_code in allowed:
+                # The device keeps its control code, no need to scan the bus.
+                candidates = [current_code]
+            else:
+                # Other control codes that respond now are of other devices.
+                candidates = [current_code] + [
+                    code for code in allowed if not self.scan_greenpak_device(code)
+                ]
+
         # Set register bit 1601 to reset the device.
-        self.write_register_bytes(0xC8, bytearray([0x02]))
-        # Allow the operation to complete.
-        # TODO: Check with the datasheet what time period to use here.
-        time.sleep(0.1)
+        self.write_register_bytes(devices.RESET_BYTE_ADDR, bytearray([0x02]))
+
+        # Wait until the device stops responding, or for the min reset time.
+        start_time = time.monotonic()
+        deadline = start_time + timeout_secs
+        while time.monotonic() < start_time + RESET_MIN_SECS:
+            if not self.scan_greenpak_device(current_code):
+                break
+            time.sleep(RESET_POLL_SECS)
+
+        # Poll until the device responds.
+        while True:
+            for control_code in candidates:
+                if self.scan_greenpak_device(control_code):
+                    if control_code != self.__device_control_code:
+                        print(f"Device moved to control code {control_code}.", flush=True)
+                        self.set_device_control_code(control_code)
+                    return control_code
+            if time.monotonic() >= deadline:
+                raise GreenpakError(
+                    f"Device didn't respond within {timeout_secs} secs after a reset, control codes {candidates}."
+                )
+            time.sleep(RESET_POLL_SECS)
 
     def scan_greenpak_device(self, control_code: int) -> bool:
         """Test if a GreenPak device exists.
@@ -420,7 +1318,8 @@ class GreenpakDriver:
             device_i2c_addr = self.__i2c_device_addr(
                 _MemorySpace.REGISTER, control_code
             )
-            ok = ok and self.__i2c.gp_write(device_i2c_addr, 0, bytearray([]))
+            with self.__lock:
+                ok = ok and self.__i2c.gp_write(device_i2c_addr, 0, bytearray([]))
         return ok
 
     def scan_greenpak_devices(self) -> None:
@@ -439,24 +1338,9 @@ class GreenpakDriver:
         return result
 
     @classmethod
-    def __control_code_config_byte(cls, control_code_spec: str) -> None:
+    def __control_code_config_byte(cls, control_code_spec: str) -> int:
         """Computes a control code config byte from a control code spec."""
-        assert isinstance(control_code_spec, str)
-        assert re.match(r"^[01X]{4}$", control_code_spec), control_code_spec
-        # By default all bits are internal and zero.
-        control_byte = 0b00000000
-        # 4 LSB bits
-        # control_selection = 0b0000
-        for i in range(4):
-            # mask = 1 << (3 - i)
-            c = control_code_spec[i]
-            if c == "1":
-                # Set bit internal value to 1.
-                control_byte |= 1 << (3 - i)
-            elif c == "X":
-                # Set bit selection to external.
-                control_byte |= 1 << (7 - i)
-        return control_byte
+        return devices.control_code_config_byte(control_code_spec)
 
     def program_control_code(self, control_code_spec: str) -> None:
         """Program device(s) control code(s).
@@ -0,0 +1,191 @@
+"""A wear leveled record log and a key/value store over the EEPROM space of a GreenPak."""
+
+from greenpak.driver import GreenpakDriver
+from typing import Optional, List, Tuple, Dict
+import binascii
+import struct
+
+# Each record occupies a whole 16 bytes page:
+# magic (1), sequence number (4), payload length (1), payload (8), crc16 (2).
+_RECORD_MAGIC = 0xA5
+_RECORD_FORMAT = "<BIB8s"
+_CRC_FORMAT = "<H"
+
+# The max number of payload bytes in a record.
+MAX_PAYLOAD_SIZE: int = 8
+
+
+def _encode_record(seq: int, payload: bytes) -> bytearray:
+    """Returns the 16 bytes page of a record."""
+    data = struct.pack(_RECORD_FORMAT, _RECORD_MAGIC, seq, len(payload), payload)
+    crc = binascii.crc_hqx(data, 0xFFFF)
+    return bytearray(data + struct.pack(_CRC_FORMAT, crc))
+
+
+def _decode_record(page_data: bytes) -> Optional[Tuple[int, bytes]]:
+    """Returns the (seq, payload) of a record page, or None if the page is not a valid
+    record, e.g. an erased page or a partially written one."""
+    assert len(page_data) == 16
+    magic, seq, n, payload = struct.unpack(_RECORD_FORMAT, page_data[:14])
+    (crc,) = struct.unpack(_CRC_FORMAT, page_data[14:])
+    if magic != _RECORD_MAGIC or n > MAX_PAYLOAD_SIZE:
+        return None
+    if binascii.crc_hqx(page_data[:14], 0xFFFF) != crc:
+        return None
+    return (seq, payload[:n])
+
+
+class EepromLog:
+    """A log of small records that rotates over a range of EEPROM pages.
+
+    Each record occupies a page and carries a sequence number and a CRC. Appending a
+    record programs the page after the newest record, overwriting the oldest record once
+    all pages are in use, so the pages wear evenly and an append costs a single page
+    program. The log is mounted with a single bulk read of the EEPROM, which skips pages
+    that don't have a valid record, such as a page whose programming was interrupted.
+
+    :param gp_driver: The driver of the device.
+    :type gp_driver: GreenpakDriver
+
+    :param first_page: The index of the first EEPROM page of the log.
+    :type first_page: int
+
+    :param num_pages: The number of EEPROM pages of the log, at least 2.
+    :type num_pages: int
+    """
+
+    def __init__(self, gp_driver: GreenpakDriver, first_page: int = 0, num_pages: int = 16):
+        assert isinstance(gp_driver, GreenpakDriver)
+        assert 0 <= first_page <= 15
+        assert 2 <= num_pages
+        assert first_page + num_pages <= 16
+        self.__gp_driver = gp_driver
+        self.__first_page = first_page
+        self.__num_pages = num_pages
+        self.mount()
+
+    def mount(self) -> None:
+        """Reads the log from the device. Called by the constructor."""
+        data = self.__gp_driver.read_eeprom_bytes(
+            self.__first_page << 4, self.__num_pages << 4
+        )
+        # The (seq, payload) of each slot, or None.
+        self.__slots: List[Optional[Tuple[int, bytes]]] = [
+            _decode_record(data[i << 4 : (i + 1) << 4]) for i in range(self.__num_pages)
+        ]
+        # The slot of the newest record, or -1 if the log is empty.
+        self.__head = -1
+        for i, record in enumerate(self.__slots):
+            if record is not None and (
+                self.__head < 0 or record[0] > self.__slots[self.__head][0]
+            ):
+                self.__head = i
+
+    def __next_slot(self) -> int:
+        return (self.__head + 1) % self.__num_pages
+
+    def next_overwritten(self) -> Optional[Tuple[int, bytes]]:
+        """Returns the (seq, payload) of the record that the next append overwrites, or None
+        if the next append uses an empty page."""
+        return self.__slots[self.__next_slot()]
+
+    def append(self, payload: bytes) -> int:
+        """Appends a record to the log.
+
+        :param payload: The record payload, up to ``MAX_PAYLOAD_SIZE`` bytes.
+        :type payload: bytes or bytearray
+
+        :returns: The sequence number of the new record.
+        :rtype: int
+        """
+        assert len(payload) <= MAX_PAYLOAD_SIZE
+        seq = 1 if self.__head < 0 else self.__slots[self.__head][0] + 1
+        assert seq <= 0xFFFFFFFF
+        slot = self.__next_slot()
+        self.__gp_driver.program_eeprom_pages(
+            self.__first_page + slot, _encode_record(seq, bytes(payload))
+        )
+        self.__slots[slot] = (seq, bytes(payload))
+        self.__head = slot
+        return seq
+
+    def records(self) -> List[Tuple[int, bytes]]:
+        """Returns the (seq, payload) of the records in the log, oldest first."""
+        return sorted(r for r in self.__slots if r is not None)
+
+    def latest(self) -> Optional[Tuple[int, bytes]]:
+        """Returns the (seq, payload) of the newest record, or None if the log is empty."""
+        return None if self.__head < 0 else self.__slots[self.__head]
+
+    def capacity(self) -> int:
+        """Returns the number of records that the log retains."""
+        return self.__num_pages
+
+
+class EepromKeyValueStore:
+    """A key/value store over an ``EepromLog``.
+
+    Each set appends a record with a one byte key and a value of up to
+    ``MAX_PAYLOAD_SIZE - 1`` bytes. The value of a key is that of its newest record.
+    Before an append overwrites the only record of a live key, that record is copied
+    forward, so the number of keys must be less than the log capacity.
+
+    :param log: The underlying log.
+    :type log: EepromLog
+    """
+
+    def __init__(self, log: EepromLog):
+        assert isinstance(log, EepromLog)
+        self.__log = log
+        self.__values: Dict[int, bytes] = {}
+        # The seq of the newest record of each key.
+        self.__seqs: Dict[int, int] = {}
+        for seq, payload in log.records():
+            if payload:
+                self.__values[payload[0]] = payload[1:]
+                self.__seqs[payload[0]] = seq
+
+    def get(self, key: int) -> Optional[bytes]:
+        """Returns the value of a key, or None if the key is not set."""
+        return self.__values.get(key)
+
+    def keys(self) -> List[int]:
+        """Returns the sorted list of keys that are set."""
+        return sorted(self.__values.keys())
+
+    def set(self, key: int, value: bytes) -> None:
+        """Sets the value of a key. Does nothing if the key already has this value.
+
+        :param key: The key, in the range [0, 255].
+        :type key: int
+
+        :param value: The value, up to ``MAX_PAYLOAD_SIZE - 1`` bytes.
+        :type value: bytes or bytearray
+
+        :returns: None
+        """
+        assert 0 <= key <= 255
+        assert len(value) <= MAX_PAYLOAD_SIZE - 1
+        value = bytes(value)
+        if self.__values.get(key) == value:
+            return
+        assert len(set(self.__values.keys()) | {key}) < self.__log.capacity()
+        self.__preserve_overwritten(key)
+        self.__append(key, value)
+
+    def __preserve_overwritten(self, key: int) -> None:
+        """Copies forward live records of keys other than ``key`` that the next append
+        would overwrite."""
+        while True:
+            record = self.__log.next_overwritten()
+            if record is None or not record[1]:
+                return
+            seq, payload = record
+            other_key = payload[0]
+            if other_key == key or self.__seqs.get(other_key) != seq:
+                return
+            self.__append(other_key, payload[1:])
+
+    def __append(self, key: int, value: bytes) -> None:
+        self.__seqs[key] = self.__log.append(bytes([key]) + value)
+        self.__values[key] = value
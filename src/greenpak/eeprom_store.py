@@ -0,0 +1,127 @@
+"""A byte addressable, write-back cached store over the EEPROM space of a GreenPak."""
+
+from greenpak.driver import GreenpakDriver
+from typing import Optional, Set
+import time
+
+
+class EepromStore:
+    """A byte addressable store over the 256 bytes EEPROM space of a GreenPak device.
+
+    The EEPROM is read once, with a single bulk read, when the store is created. Reads are
+    served from memory, and writes update memory and mark their pages as dirty. Dirty pages
+    are programmed to the device by ``flush()``, by ``close()``, or once ``flush_delay_secs``
+    passed since the first unflushed write, which is checked on each call to the store and
+    by ``poll()``. Many small writes to the same page therefore cost a single page program,
+    and pages whose data ended up unchanged are not programmed at all.
+
+    The store assumes that it's the only writer of the EEPROM while it's open. It can be
+    used as a context manager which closes it on exit.
+
+    :param gp_driver: The driver of the device.
+    :type gp_driver: GreenpakDriver
+
+    :param flush_delay_secs: The max time that written data stays unflushed, or None to flush
+        only on demand.
+    :type flush_delay_secs: float
+    """
+
+    def __init__(self, gp_driver: GreenpakDriver, flush_delay_secs: Optional[float] = None):
+        assert isinstance(gp_driver, GreenpakDriver)
+        assert flush_delay_secs is None or flush_delay_secs >= 0
+        self.__gp_driver = gp_driver
+        self.__flush_delay_secs = flush_delay_secs
+        # The EEPROM content as last read or programmed.
+        self.__device_data: bytes = bytes(gp_driver.read_eeprom_bytes(0, 256))
+        # The EEPROM content including unflushed writes.
+        self.__data: bytearray = bytearray(self.__device_data)
+        self.__dirty_pages: Set[int] = set()
+        self.__flush_deadline: Optional[float] = None
+
+    def __enter__(self) -> "EepromStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def read(self, address: int, n: int) -> bytearray:
+        """Reads bytes from the store, including unflushed writes.
+
+        :param address: The address of the first byte, in the range [0, 255].
+        :type address: int
+
+        :param n: The number of bytes to read.
+        :type n: int
+
+        :returns: The bytes read.
+        :rtype: bytearray
+        """
+        assert 0 <= address <= 255
+        assert 0 < n
+        assert address + n <= 256
+        self.poll()
+        return self.__data[address : address + n]
+
+    def write(self, address: int, data: bytearray | bytes) -> None:
+        """Writes bytes to the store. The bytes are programmed to the device when flushed.
+
+        :param address: The address of the first byte, in the range [0, 255].
+        :type address: int
+
+        :param data: The bytes to write.
+        :type data: bytearray or bytes
+
+        :returns: None
+        """
+        n = len(data)
+        assert 0 <= address <= 255
+        assert 0 < n
+        assert address + n <= 256
+        self.__data[address : address + n] = data
+        self.__dirty_pages.update(range(address >> 4, ((address + n - 1) >> 4) + 1))
+        if self.__flush_deadline is None and self.__flush_delay_secs is not None:
+            self.__flush_deadline = time.monotonic() + self.__flush_delay_secs
+        self.poll()
+
+    def dirty_pages(self) -> Set[int]:
+        """Returns the indexes of the pages whose data differs from the device."""
+        return set(i for i in self.__dirty_pages if self.__is_changed(i))
+
+    def __is_changed(self, page_index: int) -> bool:
+        page_slice = slice(page_index << 4, (page_index + 1) << 4)
+        return self.__data[page_slice] != self.__device_data[page_slice]
+
+    def poll(self) -> None:
+        """Flushes the store if its flush deadline passed. Call it periodically if the
+        store is not otherwise accessed."""
+        if self.__flush_deadline is not None and time.monotonic() >= self.__flush_deadline:
+            self.flush()
+
+    def flush(self) -> None:
+        """Programs the changed pages to the device. Consecutive changed pages are programmed
+        with a single call to ``program_eeprom_pages()``.
+
+        :returns: None
+        """
+        changed_pages = sorted(self.dirty_pages())
+        i = 0
+        while i < len(changed_pages):
+            # Find a run of consecutive pages.
+            j = i + 1
+            while j < len(changed_pages) and changed_pages[j] == changed_pages[j - 1] + 1:
+                j += 1
+            start = changed_pages[i] << 4
+            end = (changed_pages[j - 1] + 1) << 4
+            self.__gp_driver.program_eeprom_pages(
+                changed_pages[i], self.__data[start:end]
+            )
+            device_data = bytearray(self.__device_data)
+            device_data[start:end] = self.__data[start:end]
+            self.__device_data = bytes(device_data)
+            i = j
+        self.__dirty_pages.clear()
+        self.__flush_deadline = None
+
+    def close(self) -> None:
+        """Flushes the store. The store should not be used after it's closed."""
+        self.flush()
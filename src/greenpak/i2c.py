@@ -1,5 +1,7 @@
 """I2C drivers for the ``greenpak`` package."""
 
+from typing import List, Dict, Tuple
+import time
 from typing_extensions import override
 from typing_extensions import deprecated
 
@@ -7,6 +9,24 @@ from typing_extensions import deprecated
 class GreenPakI2cInterface:
     """A base class for GreenPak compatible I2C driver implementations."""
 
+    # The default estimates of the fixed host/adapter cost of a transaction, and of the
+    # host/adapter cost per data byte, in seconds. Implementations override them. See
+    # gp_cost_model().
+    _GP_TRANSACTION_SECS: float = 0.001
+    _GP_HOST_BYTE_SECS: float = 0.0
+
+    # The speed, auto speed and cost model state. Declared as class level defaults, which
+    # the methods below shadow with instance attributes, such that implementations that
+    # don't call ``super().__init__()`` work as is.
+    __cost_model: Tuple[float, float] | None = None
+    __speed_hz: int | None = None
+    __max_speed_hz: int | None = None
+    __auto_speed: bool = False
+    __error_burst: int = 0
+    __clean_window: int = 0
+    __error_count: int = 0
+    __clean_count: int = 0
+
     def gp_write(self, i2c_addr: int, start: int, data: bytearray) -> bool:
         """New interface method: gp_write()
 
@@ -37,6 +57,227 @@ class GreenPakI2cInterface:
 
         assert False, f"Class {self.__class__} does not implement gp_read()"
 
+    def gp_read_into(self, i2c_addr: int, start: int, buffer: bytearray | memoryview) -> bool:
+        """Same as ``gp_read()`` but reads ``len(buffer)`` bytes into a caller supplied buffer.
+
+        Implementations may override this method to avoid allocating the result. The
+        default implementation calls ``gp_read()`` and copies the result.
+
+        :param i2c_addr: I2C device address in the range [0, 127]
+        :type addr: int
+
+        :param start: SLG memory/register start address for the read, range [0,256]
+        :type start: int
+
+        :param buffer: A writable buffer. Its content is undefined if the read fails.
+        :type buffer: bytearray or memoryview
+
+        :returns: True if the read succeeds.
+        :rtype: bool
+        """
+        data = self.gp_read(i2c_addr, start, len(buffer))
+        if data is None or len(data) != len(buffer):
+            return False
+        buffer[:] = data
+        return True
+
+    def gp_batch(self, ops: List[Tuple]) -> List[bool | bytearray | None]:
+        """Executes a sequence of operations, stopping after the first one that fails.
+
+        The supported operations are:
+
+        * ``("write", i2c_addr, start, data)``, same as ``gp_write()``. Its result is a bool.
+        * ``("write_ignore", i2c_addr, start, data)``, same as ``"write"`` but a failure
+          doesn't stop the sequence. Used for writes the device may NACK even if they
+          succeed, such as the page erase byte, whose effect is verified by a later
+          ``"expect"``.
+        * ``("read", i2c_addr, start, byte_count)``, same as ``gp_read()``. Its result is
+          the bytes read or None.
+        * ``("expect", i2c_addr, start, data)``, reads ``len(data)`` bytes and compares them to
+          ``data``. Its result is True if the read succeeded and matched.
+        * ``("sleep", secs)``, waits. Its result is True.
+
+        The default implementation executes the operations one by one. Implementations with
+        a high per call latency, such as remote drivers, override it to execute the sequence
+        with a single round trip.
+
+        :param ops: The operations.
+        :type ops: List[Tuple]
+
+        :returns: The results of the executed operations, in order. Shorter than ``ops`` if
+            an operation failed, in which case the last result is False or None.
+        :rtype: List[bool | bytearray | None]
+        """
+        results = []
+        for op in ops:
+            kind = op[0]
+            if kind == "write" or kind == "write_ignore":
+                result = self.gp_write(op[1], op[2], op[3])
+            elif kind == "read":
+                result = self.gp_read(op[1], op[2], op[3])
+            elif kind == "expect":
+                data = self.gp_read(op[1], op[2], len(op[3]))
+                result = data is not None and data == op[3]
+            elif kind == "sleep":
+                time.sleep(op[1])
+                result = True
+            else:
+                assert False, f"Unknown operation: {kind}"
+            results.append(result)
+            if (result is None or result is False) and kind != "write_ignore":
+                break
+        return results
+
+    def gp_speeds(self) -> List[int]:
+        """Returns the I2C bus speeds that this driver can set.
+
+        :returns: The supported bus speeds in Hz, in ascending order. An empty list if the
+            bus speed is fixed by the adapter or the OS and can't be set by this driver.
+        :rtype: List[int]
+        """
+        return []
+
+    def _gp_apply_speed(self, speed_hz: int) -> None:
+        """An internal method that implementations that support ``gp_speeds()`` override to
+        set the bus speed of the backend. ``speed_hz`` is one of the values of ``gp_speeds()``.
+        """
+        assert False, f"Class {self.__class__} does not implement _gp_apply_speed()"
+
+    def gp_set_speed(self, speed_hz: int) -> None:
+        """Sets the I2C bus speed.
+
+        The speed also becomes the max speed that the auto speed mode steps back up to.
+
+        :param speed_hz: The bus speed in Hz, such as 100000 or 400000. Asserted to be one of
+            the values returned by ``gp_speeds()``.
+        :type speed_hz: int
+
+        :returns: None
+        """
+        assert speed_hz in self.gp_speeds(), f"Speed {speed_hz} not in {self.gp_speeds()}"
+        self.__apply_speed(speed_hz)
+        self.__max_speed_hz = speed_hz
+
+    def gp_get_speed(self) -> int | None:
+        """Returns the current I2C bus speed.
+
+        :returns: The bus speed in Hz, or None if this driver can't set the bus speed.
+        :rtype: int | None
+        """
+        return self.__speed_hz
+
+    def gp_set_auto_speed(
+        self, enabled: bool, error_burst: int = 3, clean_window: int = 200
+    ) -> None:
+        """Enables or disables automatic bus speed tuning.
+
+        When enabled, the bus speed is stepped down to the next supported speed after
+        ``error_burst`` failed transactions, and stepped back up, no higher than the
+        speed set by ``gp_set_speed()``, after ``clean_window`` consecutive successful
+        transactions. Transactions are reported by the ``GreenpakDriver`` via
+        ``gp_report_transaction()``.
+
+        :param enabled: True to enable auto speed, False to keep the current speed fixed.
+        :type enabled: bool
+
+        :param error_burst: The number of failures, without an intervening clean window, that
+            triggers a step down.
+        :type error_burst: int
+
+        :param clean_window: The number of consecutive successful transactions that triggers
+            a step up and clears the error count.
+        :type clean_window: int
+
+        :returns: None
+        """
+        assert isinstance(enabled, bool)
+        assert error_burst > 0
+        assert clean_window > 0
+        if enabled:
+            assert self.__speed_hz is not None, f"{self.__class__} can't set bus speed"
+        self.__auto_speed = enabled
+        self.__error_burst = error_burst
+        self.__clean_window = clean_window
+        self.__error_count = 0
+        self.__clean_count = 0
+
+    def gp_report_transaction(self, ok: bool) -> None:
+        """Reports the outcome of a GreenPak transaction to the auto speed logic.
+
+        A failure is a NACK'ed or short transaction, or a memory verification mismatch.
+        This is a no-op if auto speed is disabled.
+
+        :param ok: True if the transaction succeeded.
+        :type ok: bool
+
+        :returns: None
+        """
+        if not self.__auto_speed:
+            return
+        if not ok:
+            self.__clean_count = 0
+            self.__error_count += 1
+            if self.__error_count >= self.__error_burst:
+                self.__error_count = 0
+                slower = [s for s in self.gp_speeds() if s < self.__speed_hz]
+                if slower:
+                    print(f"I2C errors, stepping down to {slower[-1]} Hz.", flush=True)
+                    self.__apply_speed(slower[-1])
+            return
+        self.__clean_count += 1
+        if self.__clean_count >= self.__clean_window:
+            self.__clean_count = 0
+            self.__error_count = 0
+            if self.__speed_hz < self.__max_speed_hz:
+                faster = [s for s in self.gp_speeds() if s > self.__speed_hz]
+                print(f"I2C clean, stepping up to {faster[0]} Hz.", flush=True)
+                self.__apply_speed(faster[0])
+
+    def gp_cost_model(self) -> Tuple[float, float]:
+        """Returns the estimated cost of transactions with this driver.
+
+        The time of a transaction with ``n`` data bytes is estimated as
+        ``transaction_secs + n * byte_secs``. It's used by the ``GreenpakDriver`` to decide
+        between reading or writing a span of bytes in one transaction or in several. Unless
+        set by ``gp_set_cost_model()``, the estimate is a per implementation default, with
+        the byte cost of the current bus speed.
+
+        :returns: A tuple of (transaction_secs, byte_secs).
+        :rtype: Tuple[float, float]
+        """
+        if self.__cost_model is not None:
+            return self.__cost_model
+        # 9 clocks per byte, including the ack bit. Assume 100kHz if the speed is unknown.
+        speed_hz = self.__speed_hz or 100000
+        return (self._GP_TRANSACTION_SECS, 9 / speed_hz + self._GP_HOST_BYTE_SECS)
+
+    def gp_set_cost_model(
+        self, transaction_secs: float | None, byte_secs: float | None = None
+    ) -> None:
+        """Sets the cost model returned by ``gp_cost_model()``, e.g. as measured by
+        ``greenpak.planner.measure_cost_model()``.
+
+        :param transaction_secs: The fixed cost of a transaction in seconds, or None to
+            revert to the default estimate.
+        :type transaction_secs: float | None
+
+        :param byte_secs: The cost per data byte in seconds. Ignored if
+            ``transaction_secs`` is None.
+        :type byte_secs: float | None
+
+        :returns: None
+        """
+        if transaction_secs is None:
+            self.__cost_model = None
+            return
+        assert transaction_secs >= 0
+        assert byte_secs is not None and byte_secs >= 0
+        self.__cost_model = (transaction_secs, byte_secs)
+
+    def __apply_speed(self, speed_hz: int) -> None:
+        self._gp_apply_speed(speed_hz)
+        self.__speed_hz = speed_hz
+
     def _is_errata(self, start: int, byte_count: int) -> bool:
         """An internal helper to detect writes that are subject to the Greenpak erase errata.
         """
@@ -49,8 +290,12 @@ class GreenPakI2cAdapter(GreenPakI2cInterface):
     def __init__(self, port):
         from i2c_adapter import I2cAdapter
 
+        super().__init__()
         print(f"Creating an i2c {type(self).__name__} driver.")
         self.__i2c: I2cAdapter = I2cAdapter(port)
+        # Reusable buffers for the start address and for the write payload.
+        self.__start_buffer = bytearray(1)
+        self.__payload = bytearray(1)
 
     @override
     def gp_read(self, i2c_addr: int, start: int, byte_count: int) -> bytearray | None:
@@ -59,7 +304,8 @@ class GreenPakI2cAdapter(GreenPakI2cInterface):
         # )
         data = None
         # Write the reading start address.
-        ok = self.__i2c.write(i2c_addr, bytearray([start]))
+        self.__start_buffer[0] = start
+        ok = self.__i2c.write(i2c_addr, self.__start_buffer)
         if ok:
             data = self.__i2c.read(i2c_addr, byte_count)
             ok = data is not None
@@ -70,9 +316,10 @@ class GreenPakI2cAdapter(GreenPakI2cInterface):
         # print(
         #     f"{self.__class__}.gp_write(): Addr: {i2c_addr:07b}, Start: 0x{start:02x}, count: {len(data)}"
         # )
-        payload = bytearray()
-        payload.append(start)
-        payload.extend(data)
+        # Resized in place, which avoids a new allocation per write.
+        payload = self.__payload
+        payload[0] = start
+        payload[1:] = data
         # When the errata applies, we want to supress the false error regarding the missing nak.
         is_errata = self._is_errata(start, len(data))
         ok = self.__i2c.write(i2c_addr, payload, silent=is_errata)
@@ -85,54 +332,135 @@ class GreenPakI2cAdapter(GreenPakI2cInterface):
 class GreenPakI2cDriver(GreenPakI2cInterface):
     """A GreenPakI2cInterface implementation for I2C Adapter boards."""
 
-    def __init__(self, port, pullups=True):
-        from i2cdriver import I2CDriver
+    def __init__(self, port, pullups=True, speed_hz: int = 100000):
+        from i2cdriver import I2CDriver, I2CTimeout
 
+        super().__init__()
         print(f"Creating an i2c {type(self).__name__}  driver.")
         self.__i2c: I2CDriver = I2CDriver(port, reset=True)
+        self.__timeout_exception = I2CTimeout
+        # Reusable buffer for the ack bytes of a command sequence, and cached
+        # read command sequences.
+        self.__acks = bytearray(8)
+        self.__read_cmds: Dict[Tuple[int, int, int], bytes] = {}
+        # Reusable buffer for write command sequences. Fits the start address and 256 data
+        # bytes in 64 bytes chunks, with the start, address, chunk headers and stop.
+        self.__write_cmd = bytearray(2 + 257 + 5 + 1)
         # Per https://i2cdriver.com/i2cdriver.pdf
         # 4.7K on SCL/SDA if pullups is True, else, no pullups.
         self.__i2c.setpullups(0b100100 if pullups else 0b000000)
+        self.gp_set_speed(speed_hz)
+
+    @override
+    def gp_speeds(self) -> List[int]:
+        return [100000, 400000]
+
+    @override
+    def _gp_apply_speed(self, speed_hz: int) -> None:
+        # The I2CDriver API uses kHz.
+        self.__i2c.setspeed(speed_hz // 1000)
+
+    def __exchange(
+        self, cmd: bytearray, num_acks: int, buffer: bytearray | memoryview | None
+    ) -> bool:
+        """Sends a sequence of I2CDriver commands in a single USB write and
+        reads back their ack bytes and the read data, if any, into the given
+        buffer. Returns True if all the acks were received."""
+        ser = self.__i2c.ser
+        ser.write(cmd)
+        with memoryview(self.__acks)[:num_acks] as acks:
+            if ser.readinto(acks) != num_acks:
+                return False
+        if buffer is not None and ser.readinto(buffer) != len(buffer):
+            return False
+        for i in range(num_acks):
+            if self.__acks[i] & 2:
+                raise self.__timeout_exception
+            if not (self.__acks[i] & 1):
+                return False
+        return True
+
+    def __read_cmd(self, i2c_addr: int, start: int, byte_count: int) -> bytes:
+        """Returns the command sequence of a read. Polling loops repeat the same
+        reads, so the sequences are cached."""
+        key = (i2c_addr, start, byte_count)
+        cmd = self.__read_cmds.get(key)
+        if cmd is not None:
+            return cmd
+        # Start a write transaction with the start address, then a read
+        # transaction, with the same command encoding as I2CDriver.start(),
+        # .write() and .read() but without waiting for each command's response.
+        cmd = bytearray(b"s")
+        cmd.append(i2c_addr << 1)
+        cmd.extend((0xC0, start))
+        cmd.extend(b"s")
+        cmd.append((i2c_addr << 1) | 1)
+        # Reads of more than 64 bytes are done in 64 bytes acked chunks, and
+        # the last chunk nacks its last byte.
+        n = byte_count
+        while n > 64:
+            cmd.extend((ord("a"), 64))
+            n -= 64
+        if n > 0:
+            cmd.append(0x80 + n - 1)
+        cmd.extend(b"p")
+        if len(self.__read_cmds) >= 256:
+            self.__read_cmds.clear()
+        self.__read_cmds[key] = bytes(cmd)
+        return self.__read_cmds[key]
 
     @override
     def gp_read(self, i2c_addr: int, start: int, byte_count: int) -> bytearray | None:
-        data = None
-        # Start i2c write transaction.
-        ok = self.__i2c.start(i2c_addr, 0)
-        if ok:
-            # Write start address to read.
-            ok = self.__i2c.write(bytearray([start]))  #
-        if ok:
-            # Start i2c read transaction.
-            ok = self.__i2c.start(i2c_addr, 1)
-        if ok:
-            # Read bytes.
-            data = self.__i2c.read(byte_count)
-        # Stop the i2c transaction.
-        self.__i2c.stop()
-        return data if ok else None
+        data = bytearray(byte_count)
+        return data if self.gp_read_into(i2c_addr, start, data) else None
+
+    @override
+    def gp_read_into(self, i2c_addr: int, start: int, buffer: bytearray | memoryview) -> bool:
+        cmd = self.__read_cmd(i2c_addr, start, len(buffer))
+        return self.__exchange(cmd, 3, buffer)
 
     @override
     def gp_write(self, i2c_addr: int, start: int, data: bytearray) -> bool:
-        # Start i2c write transaction.
-        ok = self.__i2c.start(i2c_addr, 0)
-        if ok:
-            # Write start address to write.
-            ok = self.__i2c.write(bytearray([start]))  #
-        if ok and len(data) > 0:
-            ok = self.__i2c.write(data)
-        # Stop the i2c transaction.
-        self.__i2c.stop()
-        return ok
+        # Same as gp_read(), start a write transaction and write the start
+        # address followed by the data, in chunks of up to 64 bytes. The command
+        # is encoded in place in the reusable write buffer.
+        payload_len = len(data) + 1
+        cmd = self.__write_cmd
+        cmd[0] = ord("s")
+        cmd[1] = i2c_addr << 1
+        k = 2
+        num_acks = 1
+        for i in range(0, payload_len, 64):
+            chunk_len = min(64, payload_len - i)
+            cmd[k] = 0xC0 + chunk_len - 1
+            k += 1
+            # The payload is the start address followed by the data.
+            if i == 0:
+                cmd[k] = start
+                cmd[k + 1 : k + chunk_len] = data[: chunk_len - 1]
+            else:
+                cmd[k : k + chunk_len] = data[i - 1 : i - 1 + chunk_len]
+            k += chunk_len
+            num_acks += 1
+        cmd[k] = ord("p")
+        k += 1
+        with memoryview(cmd) as view:
+            return self.__exchange(view[:k], num_acks, None)
 
 
 class GreenPakSMBusAdapter(GreenPakI2cInterface):
     """An adpater to the Linux 'native' SMBus interface"""
 
+    # A kernel call per transaction, no USB round trip.
+    _GP_TRANSACTION_SECS = 0.0002
+
     import smbus2
     from smbus2 import smbus2
 
     def __init__(self, i2cbusdev="/dev/i2c-0", traces=False):
+        # NOTE: The bus speed is set by the kernel driver configuration (e.g.
+        # dtparam=i2c_arm_baudrate on a Raspberry Pi) and not by this class.
+        super().__init__()
         print(f"Creating an i2c {type(self).__name__} driver.")
         self.bus = self.smbus2.SMBus(i2cbusdev)
         self.isopen = True
@@ -182,25 +510,12 @@ class GreenPakSMBusAdapter(GreenPakI2cInterface):
         # Due to device(SLG46826x) NACK'ing us on erase request (ref. errata sheet), the smbus will
         # throw error, but we need to ignore it, otherwise whole erase/write will fail higher up the stack.
 
+        # The erase is verified by the caller, which reads back the erased page.
         if self.trace_errors == True and ewhat != None:
             print(
-                f'{self.__class__.__name__}: "{ewhat}" while trying to write to reg 0xE3...'
+                f'{self.__class__.__name__}: ignoring "{ewhat}" while writing to reg 0xE3 (device errata).'
             )
-        import inspect
-
-        stack = inspect.stack()
-        for frame_info in stack:
-            # ..but it can be anyone of 3 regions, and we don't know
-            # at _this_ stack level where it is; upper driver has that nfo
-            # So this is dirty as.
-            if frame_info.function == "__erase_page":
-                if self.trace_errors == True:
-                    print(
-                        f"{self.__class__.__name__}: ignoring error while erase page called (device errata)."
-                    )
-                return True
-
-        return False
+        return True
 
     @override
     def gp_read(self, i2c_addr: int, start: int, byte_count: int) -> bytearray | None:
@@ -239,8 +554,7 @@ class GreenPakSMBusAdapter(GreenPakI2cInterface):
                 # (assume caller probing for GP devs on bus).
                 self.__empty_wr(i2c_addr)  # Can throw
             elif 1 == len(data):
-                # TODO: Use self._is_errata() to trigger the errata handling.
-                if start == 0xE3:  # A non-volatile mem erase request, _possibly_
+                if self._is_errata(start, len(data)):  # A non-volatile mem erase request.
                     return self.__gp_wr_0xE3_reg(i2c_addr, data)
                 else:
                     self.bus.write_i2c_block_data(i2c_addr, start, data)
@@ -270,11 +584,56 @@ class GreenPakBusPirate(GreenPakI2cInterface):
 
     from vendor.pyBusPirateLite.I2C import I2C, ProtocolError
 
-    def __init__(self, port):
+    # Binary I2C mode command bytes.
+    __CMD_START = 0x02
+    __CMD_BULK_WRITE_2 = 0x11
+    __CMD_WRITE_THEN_READ = 0x08
+
+    # Bus speeds in Hz and their pyBusPirateLite names.
+    __SPEED_NAMES = {5000: "5kHz", 50000: "50kHz", 100000: "100kHz", 400000: "400kHz"}
+
+    # A USB serial round trip per transaction, and the data bytes also pass through the
+    # 115200 baud serial link, 10 bits per byte.
+    _GP_TRANSACTION_SECS = 0.002
+    _GP_HOST_BYTE_SECS = 10 / 115200
+
+    def __init__(self, port, speed_hz: int = 400000):
+        super().__init__()
         print(f"Creating an i2c {type(self).__name__}  driver.")
         self.__i2c = self.I2C(port)
-        self.__i2c.speed = '400kHz'
+        self.gp_set_speed(speed_hz)
         self.__i2c.configure(power=True, pullup=True)
+        # A reusable read sequence. Start bit, bulk write of [write_addr, start],
+        # and a write_then_read of [read_addr] which issues the repeated start.
+        # Fields that change per call are patched in place by gp_read().
+        self.__read_cmd = bytearray(
+            [
+                self.__CMD_START,
+                self.__CMD_BULK_WRITE_2,
+                0x00,  # [2] write addr
+                0x00,  # [3] start
+                self.__CMD_WRITE_THEN_READ,
+                0x00,
+                0x01,
+                0x00,  # [7] byte count, high
+                0x00,  # [8] byte count, low
+                0x00,  # [9] read addr
+            ]
+        )
+        # A reusable write_then_read command buffer for gp_write(). Large enough
+        # for a full 256 bytes memory space write.
+        self.__write_cmd = bytearray(5 + 2 + 256)
+        self.__write_cmd[0] = self.__CMD_WRITE_THEN_READ
+        # A reusable buffer for the responses of the read sequence, before the data.
+        self.__read_resp = bytearray(5)
+
+    @override
+    def gp_speeds(self) -> List[int]:
+        return sorted(self.__SPEED_NAMES.keys())
+
+    @override
+    def _gp_apply_speed(self, speed_hz: int) -> None:
+        self.__i2c.speed = self.__SPEED_NAMES[speed_hz]
 
     def _get_write_addr(self, i2c_addr: int) -> int:
         return i2c_addr << 1
@@ -284,28 +643,48 @@ class GreenPakBusPirate(GreenPakI2cInterface):
 
     @override
     def gp_read(self, i2c_addr: int, start: int, byte_count: int) -> bytearray | None:
-        data = None
-        write_addr = self._get_write_addr(i2c_addr)
-        read_addr = self._get_read_addr(i2c_addr)
-        # Need to use start and transfer commands as I need to insert another start bit before
-        # sending out the read address without sending a stop bit. write_then_read sends out
-        # all the data, then starts reading.
-        try:
-            self.__i2c.start()
-            self.__i2c.transfer([write_addr, start])
-            data = self.__i2c.write_then_read(1, byte_count, [read_addr])
-        except self.ProtocolError:
-            return None
-        return data
+        data = bytearray(byte_count)
+        return data if self.gp_read_into(i2c_addr, start, data) else None
+
+    @override
+    def gp_read_into(self, i2c_addr: int, start: int, buffer: bytearray | memoryview) -> bool:
+        # The three commands are sent to the Bus Pirate in a single serial write
+        # and are executed back to back from its input buffer, such that the
+        # read costs a single host round trip.
+        byte_count = len(buffer)
+        cmd = self.__read_cmd
+        cmd[2] = self._get_write_addr(i2c_addr)
+        cmd[3] = start
+        cmd[7] = (byte_count >> 8) & 0xFF
+        cmd[8] = byte_count & 0xFF
+        cmd[9] = self._get_read_addr(i2c_addr)
+        port = self.__i2c.port
+        port.write(cmd)
+        # Start ack, bulk write ack, two ack/nack bits, and write_then_read status.
+        resp = self.__read_resp
+        if port.readinto(resp) != 5:
+            return False
+        if resp[4] != 0x01 or port.readinto(buffer) != byte_count:
+            return False
+        # A nack of the write address or the start byte is a failure even if
+        # the read itself went through.
+        return resp[0] == 0x01 and resp[1] == 0x01 and resp[2] == 0x00 and resp[3] == 0x00
 
     @override
     def gp_write(self, i2c_addr: int, start: int, data: bytearray) -> bool:
-        payload = bytearray()
-        payload.append(self._get_write_addr(i2c_addr))
-        payload.append(start)
-        payload.extend(data)
-        try:
-            self.__i2c.write_then_read(len(payload), 0, payload)
-        except self.ProtocolError:
-            return self._is_errata(start, len(data))
+        n = len(data)
+        numtx = n + 2
+        cmd = self.__write_cmd
+        cmd[1] = (numtx >> 8) & 0xFF
+        cmd[2] = numtx & 0xFF
+        cmd[3] = 0x00
+        cmd[4] = 0x00
+        cmd[5] = self._get_write_addr(i2c_addr)
+        cmd[6] = start
+        cmd[7 : 7 + n] = data
+        port = self.__i2c.port
+        with memoryview(cmd) as view:
+            port.write(view[: 7 + n])
+        if port.read(1) != b"\x01":
+            return self._is_errata(start, n)
         return True
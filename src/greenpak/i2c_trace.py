@@ -0,0 +1,270 @@
+"""Recording and replay of GreenPak I2C transactions.
+
+A ``GreenPakI2cRecorder`` wraps an I2C driver and records its transactions to a binary trace
+file. A ``GreenPakI2cReplay`` is an I2C driver that serves the transactions of a trace file,
+without hardware, such that a recorded session can be reproduced or benchmarked offline.
+The erase and write waits of the ``GreenpakDriver`` still apply during a replay, unless a
+zero ``greenpak.timing.TimingProfile`` is registered for the device type.
+
+The trace file starts with an 8 bytes magic string, followed by a record per transaction.
+Each record is a fixed size header followed by the data bytes, which are the written bytes
+of a write, and the bytes read of a successful read.
+"""
+
+from greenpak.i2c import GreenPakI2cInterface
+from typing import List, Tuple, NamedTuple, BinaryIO
+from typing_extensions import override
+import struct
+import time
+
+_TRACE_MAGIC = b"GPTRACE1"
+
+# op ('R' or 'W'), start time offset (secs), duration (secs), i2c address, start address,
+# byte count, ok.
+_RECORD_HEADER = struct.Struct("<cdfBBHB")
+
+
+class TraceRecord(NamedTuple):
+    """A transaction of a trace file."""
+
+    # b"R" for a read or b"W" for a write.
+    op: bytes
+    # The start time of the transaction, in seconds since the start of the recording.
+    time_secs: float
+    # The duration of the transaction in seconds.
+    duration_secs: float
+    i2c_addr: int
+    start: int
+    byte_count: int
+    ok: bool
+    # The bytes written, or the bytes read if ok, otherwise empty.
+    data: bytes
+
+
+class I2cTraceMismatchError(Exception):
+    """A replayed transaction doesn't match the next transaction of the trace."""
+
+
+def read_trace(file_path: str) -> List[TraceRecord]:
+    """Reads the records of a trace file.
+
+    :param file_path: The path of a trace file written by ``GreenPakI2cRecorder``.
+    :type file_path: str
+
+    :returns: The records, in recording order.
+    :rtype: List[TraceRecord]
+    """
+    with open(file_path, "rb") as f:
+        content = f.read()
+    assert content[: len(_TRACE_MAGIC)] == _TRACE_MAGIC, f"Not a trace file: {file_path}"
+    records = []
+    offset = len(_TRACE_MAGIC)
+    while offset < len(content):
+        op, t, dt, i2c_addr, start, n, ok = _RECORD_HEADER.unpack_from(content, offset)
+        offset += _RECORD_HEADER.size
+        data_len = n if (op == b"W" or ok) else 0
+        data = content[offset : offset + data_len]
+        assert len(data) == data_len, "Truncated trace file"
+        offset += data_len
+        records.append(TraceRecord(op, t, dt, i2c_addr, start, n, bool(ok), data))
+    return records
+
+
+class GreenPakI2cRecorder(GreenPakI2cInterface):
+    """An I2C driver that passes transactions to another driver and records them to a
+    trace file. Bus speed, auto speed, transaction reports and cost model calls are passed
+    to the wrapped driver.
+
+    The recorder can be used as a context manager which closes it on exit.
+
+    :param i2c_driver: The wrapped driver.
+    :type i2c_driver: GreenPakI2cInterface
+
+    :param file_path: The path of the trace file to write.
+    :type file_path: str
+
+    :param flush_every: The trace file is flushed after every ``flush_every`` records, such
+        that the tail of the trace of a run that crashes is not lost. The default flushes
+        after each record.
+    :type flush_every: int
+    """
+
+    def __init__(
+        self, i2c_driver: GreenPakI2cInterface, file_path: str, flush_every: int = 1
+    ):
+        assert isinstance(i2c_driver, GreenPakI2cInterface)
+        assert flush_every > 0
+        super().__init__()
+        self.__i2c = i2c_driver
+        self.__flush_every = flush_every
+        self.__unflushed_records = 0
+        self.__file: BinaryIO = open(file_path, "wb")
+        self.__file.write(_TRACE_MAGIC)
+        self.__start_time = time.perf_counter()
+
+    def __enter__(self) -> "GreenPakI2cRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the trace file."""
+        if not self.__file.closed:
+            self.__file.close()
+
+    def __record(
+        self,
+        op: bytes,
+        start_time: float,
+        i2c_addr: int,
+        start: int,
+        byte_count: int,
+        ok: bool,
+        data: bytes | bytearray | memoryview,
+    ) -> None:
+        end_time = time.perf_counter()
+        self.__file.write(
+            _RECORD_HEADER.pack(
+                op,
+                start_time - self.__start_time,
+                end_time - start_time,
+                i2c_addr,
+                start,
+                byte_count,
+                ok,
+            )
+        )
+        if op == b"W" or ok:
+            self.__file.write(data)
+        self.__unflushed_records += 1
+        if self.__unflushed_records >= self.__flush_every:
+            self.__file.flush()
+            self.__unflushed_records = 0
+
+    @override
+    def gp_read(self, i2c_addr: int, start: int, byte_count: int) -> bytearray | None:
+        start_time = time.perf_counter()
+        data = self.__i2c.gp_read(i2c_addr, start, byte_count)
+        ok = data is not None and len(data) == byte_count
+        self.__record(b"R", start_time, i2c_addr, start, byte_count, ok, data)
+        return data
+
+    @override
+    def gp_read_into(self, i2c_addr: int, start: int, buffer: bytearray | memoryview) -> bool:
+        start_time = time.perf_counter()
+        ok = self.__i2c.gp_read_into(i2c_addr, start, buffer)
+        self.__record(b"R", start_time, i2c_addr, start, len(buffer), ok, buffer)
+        return ok
+
+    @override
+    def gp_write(self, i2c_addr: int, start: int, data: bytearray) -> bool:
+        start_time = time.perf_counter()
+        ok = self.__i2c.gp_write(i2c_addr, start, data)
+        self.__record(b"W", start_time, i2c_addr, start, len(data), ok, data)
+        return ok
+
+    @override
+    def gp_speeds(self) -> List[int]:
+        return self.__i2c.gp_speeds()
+
+    @override
+    def _gp_apply_speed(self, speed_hz: int) -> None:
+        self.__i2c.gp_set_speed(speed_hz)
+
+    @override
+    def gp_set_speed(self, speed_hz: int) -> None:
+        self.__i2c.gp_set_speed(speed_hz)
+
+    @override
+    def gp_get_speed(self) -> int | None:
+        return self.__i2c.gp_get_speed()
+
+    @override
+    def gp_set_auto_speed(
+        self, enabled: bool, error_burst: int = 3, clean_window: int = 200
+    ) -> None:
+        self.__i2c.gp_set_auto_speed(enabled, error_burst, clean_window)
+
+    @override
+    def gp_report_transaction(self, ok: bool) -> None:
+        self.__i2c.gp_report_transaction(ok)
+
+    @override
+    def gp_cost_model(self) -> Tuple[float, float]:
+        return self.__i2c.gp_cost_model()
+
+    @override
+    def gp_set_cost_model(
+        self, transaction_secs: float | None, byte_secs: float | None = None
+    ) -> None:
+        self.__i2c.gp_set_cost_model(transaction_secs, byte_secs)
+
+
+class GreenPakI2cReplay(GreenPakI2cInterface):
+    """An I2C driver that replays the transactions of a trace file.
+
+    Each transaction is matched against the next record of the trace, and returns the
+    recorded result. A transaction that doesn't match its record, or that is issued after
+    the last record, raises an ``I2cTraceMismatchError``.
+
+    :param file_path: The path of a trace file written by ``GreenPakI2cRecorder``.
+    :type file_path: str
+
+    :param realtime: If True, transactions complete no earlier than they did in the
+        recording, relative to the first transaction. Otherwise they complete immediately.
+    :type realtime: bool
+    """
+
+    def __init__(self, file_path: str, realtime: bool = False):
+        super().__init__()
+        self.__records = read_trace(file_path)
+        self.__realtime = realtime
+        self.__next_index = 0
+        self.__start_time: float | None = None
+
+    def remaining(self) -> int:
+        """Returns the number of records that were not replayed yet."""
+        return len(self.__records) - self.__next_index
+
+    def __next_record(
+        self, op: bytes, i2c_addr: int, start: int, byte_count: int
+    ) -> TraceRecord:
+        if self.__next_index >= len(self.__records):
+            raise I2cTraceMismatchError(
+                f"Transaction {op.decode()} 0x{i2c_addr:02x}/0x{start:02x} is past the end of the trace."
+            )
+        record = self.__records[self.__next_index]
+        if (record.op, record.i2c_addr, record.start, record.byte_count) != (
+            op,
+            i2c_addr,
+            start,
+            byte_count,
+        ):
+            raise I2cTraceMismatchError(
+                f"Transaction {self.__next_index}: got {op.decode()} 0x{i2c_addr:02x}/0x{start:02x} n={byte_count}, "
+                f"recorded {record.op.decode()} 0x{record.i2c_addr:02x}/0x{record.start:02x} n={record.byte_count}."
+            )
+        self.__next_index += 1
+        if self.__realtime:
+            now = time.perf_counter()
+            if self.__start_time is None:
+                self.__start_time = now - record.time_secs
+            delay = self.__start_time + record.time_secs + record.duration_secs - now
+            if delay > 0:
+                time.sleep(delay)
+        return record
+
+    @override
+    def gp_read(self, i2c_addr: int, start: int, byte_count: int) -> bytearray | None:
+        record = self.__next_record(b"R", i2c_addr, start, byte_count)
+        return bytearray(record.data) if record.ok else None
+
+    @override
+    def gp_write(self, i2c_addr: int, start: int, data: bytearray) -> bool:
+        record = self.__next_record(b"W", i2c_addr, start, len(data))
+        if record.data != bytes(data):
+            raise I2cTraceMismatchError(
+                f"Transaction {self.__next_index - 1}: written data differs from the recording."
+            )
+        return record.ok
@@ -0,0 +1,196 @@
+"""Immutable images of GreenPak memory spaces.
+
+A ``GreenpakImage`` holds the 256 bytes of a memory space of a device type, such as a NVM
+configuration or EEPROM data. Images are hashable, so they can be used as dict keys and set
+members, e.g. to deduplicate the images of many devices, and their pages and page hashes are
+computed once, on first use. Images are accepted by the ``GreenpakDriver`` and
+``greenpak.utils`` methods that take configuration bytes, and ``bytes(image)`` returns their
+bytes.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+import hashlib
+
+# The memory spaces of images.
+IMAGE_SPACES: Tuple[str, ...] = ("REGISTER", "NVM", "EEPROM")
+
+
+class GreenpakImage:
+    """An immutable 256 bytes image of a memory space.
+
+    Two images are equal if they have the same device type, memory space and bytes. Page
+    comparisons compare the cached 16 bytes pages directly, which is cheaper than hashing
+    them.
+
+    :param data: The 256 bytes of the image.
+    :type data: bytes | bytearray | memoryview
+
+    :param device_type: The device type, such as ``"SLG46826"``, or an empty string if not
+        known.
+    :type device_type: str
+
+    :param memory_space: The memory space of the image, ``"REGISTER"``, ``"NVM"`` or
+        ``"EEPROM"``. The REGISTER and NVM spaces have the same configuration layout.
+    :type memory_space: str
+    """
+
+    __slots__ = (
+        "__data",
+        "__device_type",
+        "__memory_space",
+        "__hash",
+        "__pages",
+        "__page_hashes",
+        "__default_dirty_pages",
+    )
+
+    def __init__(
+        self,
+        data: bytes | bytearray | memoryview,
+        device_type: str = "",
+        memory_space: str = "NVM",
+    ):
+        assert isinstance(device_type, str)
+        assert memory_space in IMAGE_SPACES, memory_space
+        data = bytes(data)
+        assert len(data) == 256, len(data)
+        self.__data: bytes = data
+        self.__device_type: str = device_type
+        self.__memory_space: str = memory_space
+        self.__hash: Optional[int] = None
+        self.__pages: Optional[Tuple[bytes, ...]] = None
+        self.__page_hashes: Optional[Tuple[bytes, ...]] = None
+        self.__default_dirty_pages: Optional[int] = None
+
+    @classmethod
+    def device_default(cls, device_type: str, memory_space: str = "NVM") -> "GreenpakImage":
+        """Returns the default image of a device type. The REGISTER and NVM defaults are the
+        ``DeviceTypeDescriptor.default_config`` of the device type and the EEPROM default is
+        an erased EEPROM, all zeros."""
+        # Imported here since greenpak.devices imports greenpak.utils which imports this module.
+        import greenpak.devices as devices
+
+        if memory_space == "EEPROM":
+            return cls(bytes(256), device_type, memory_space)
+        default_config = devices.device_type_descriptor(device_type).default_config
+        return cls(default_config, device_type, memory_space)
+
+    @property
+    def data(self) -> bytes:
+        """The 256 bytes of the image."""
+        return self.__data
+
+    @property
+    def device_type(self) -> str:
+        """The device type of the image, or an empty string if not known."""
+        return self.__device_type
+
+    @property
+    def memory_space(self) -> str:
+        """The memory space of the image."""
+        return self.__memory_space
+
+    def __bytes__(self) -> bytes:
+        return self.__data
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __getitem__(self, key: int | slice) -> int | bytes:
+        return self.__data[key]
+
+    def __iter__(self):
+        return iter(self.__data)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GreenpakImage):
+            return NotImplemented
+        return (
+            self.__data == other.__data
+            and self.__device_type == other.__device_type
+            and self.__memory_space == other.__memory_space
+        )
+
+    def __hash__(self) -> int:
+        if self.__hash is None:
+            self.__hash = hash((self.__device_type, self.__memory_space, self.__data))
+        return self.__hash
+
+    def __repr__(self) -> str:
+        return (
+            f"GreenpakImage({self.__device_type!r}, {self.__memory_space!r}, "
+            f"{self.__data[:8].hex()}...)"
+        )
+
+    def pages(self) -> Tuple[bytes, ...]:
+        """Returns the 16 pages of the image, 16 bytes each."""
+        if self.__pages is None:
+            data = self.__data
+            self.__pages = tuple(data[i << 4 : (i + 1) << 4] for i in range(16))
+        return self.__pages
+
+    def page(self, page_index: int) -> bytes:
+        """Returns the 16 bytes of a page of the image."""
+        assert 0 <= page_index <= 15
+        return self.pages()[page_index]
+
+    def page_hashes(self) -> Tuple[bytes, ...]:
+        """Returns the 8 bytes BLAKE2 hashes of the 16 pages of the image. The hashes don't
+        depend on the device type and memory space, and are stable across processes."""
+        if self.__page_hashes is None:
+            self.__page_hashes = tuple(
+                hashlib.blake2b(page, digest_size=8).digest() for page in self.pages()
+            )
+        return self.__page_hashes
+
+    def dirty_pages(
+        self, other: Optional["GreenpakImage | bytes | bytearray"] = None
+    ) -> int:
+        """Returns the pages that differ from another image, as a bitmap.
+
+        :param other: The image to compare to, or None to compare to the ``device_default()``
+            of the image's device type and memory space. Bytes are compared as an image of the
+            same device type and memory space. The bitmap against the device default is
+            cached.
+        :type other: GreenpakImage | bytes | bytearray | None
+
+        :returns: A 16 bits int whose bit ``i`` is set if page ``i`` differs.
+        :rtype: int
+        """
+        if other is None:
+            if self.__default_dirty_pages is None:
+                assert self.__device_type, "Image has no device type"
+                default = GreenpakImage.device_default(
+                    self.__device_type, self.__memory_space
+                )
+                self.__default_dirty_pages = self.dirty_pages(default)
+            return self.__default_dirty_pages
+        if not isinstance(other, GreenpakImage):
+            other = GreenpakImage(other, self.__device_type, self.__memory_space)
+        result = 0
+        for i, (page, other_page) in enumerate(zip(self.pages(), other.pages())):
+            if page != other_page:
+                result |= 1 << i
+        return result
+
+    def changed_pages(
+        self, other: Optional["GreenpakImage | bytes | bytearray"] = None
+    ) -> List[int]:
+        """Returns the sorted indexes of the bits of ``dirty_pages(other)``."""
+        bitmap = self.dirty_pages(other)
+        return [i for i in range(16) if (bitmap >> i) & 1]
+
+    def patched(self, patches: Sequence[Tuple[int, int]]) -> "GreenpakImage":
+        """Returns a copy of the image with (address, value) patches applied, e.g. a new
+        control code byte."""
+        data = bytearray(self.__data)
+        for address, value in patches:
+            assert 0 <= address <= 255
+            assert 0 <= value <= 255
+            data[address] = value
+        return GreenpakImage(data, self.__device_type, self.__memory_space)
+
+
+def image_data(data: "GreenpakImage | bytes | bytearray") -> bytes | bytearray:
+    """Returns the bytes of an image, or the given bytes as is."""
+    return data.data if isinstance(data, GreenpakImage) else data
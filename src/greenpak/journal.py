@@ -0,0 +1,155 @@
+"""A journal of programmed pages that allows to resume interrupted programming runs."""
+
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Set
+
+
+class ProgrammingJournal:
+    """A local file that records the NVM and EEPROM pages that were successfully programmed.
+
+    When a journal is set with ``GreenpakDriver.set_journal()``, each page that is programmed
+    or is found to already have the desired value is recorded, along with the hash of the
+    image that is being programmed and a timestamp. If the run is interrupted, a rerun with
+    the same image performs a single bulk read to confirm the recorded pages and continues
+    with the pages that are not confirmed. The records of a run are cleared once the run
+    completes.
+
+    :param file_path: The path of the journal file. It is created when the first page is recorded.
+    :type file_path: str
+    """
+
+    def __init__(self, file_path: str):
+        assert isinstance(file_path, str)
+        self.__file_path = file_path
+
+    @classmethod
+    def for_device(
+        cls, dir_path: str, adapter_id: str, control_code: int
+    ) -> "ProgrammingJournal":
+        """Returns a journal with a file name that is derived from an adapter and a control code.
+
+        :param dir_path: The directory of the journal file.
+        :type dir_path: str
+
+        :param adapter_id: A string that identifies the I2C adapter, such as its port name.
+        :type adapter_id: str
+
+        :param control_code: The control code of the device, in the range [0, 15].
+        :type control_code: int
+
+        :returns: A journal for the given adapter and control code.
+        :rtype: ProgrammingJournal
+        """
+        assert isinstance(adapter_id, str)
+        assert 0 <= control_code <= 15
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", adapter_id)
+        file_name = f"{safe_id}_cc{control_code:02d}.journal"
+        return cls(os.path.join(dir_path, file_name))
+
+    def get_file_path(self) -> str:
+        """Returns the path of the journal file."""
+        return self.__file_path
+
+    @staticmethod
+    def image_hash(memory_space: str, start_page_index: int, pages_data: bytes) -> str:
+        """Returns the hash that identifies a programming run in the journal.
+
+        :param memory_space: The name of the memory space, ``"NVM"`` or ``"EEPROM"``.
+        :type memory_space: str
+
+        :param start_page_index: The index of the first page of the run.
+        :type start_page_index: int
+
+        :param pages_data: The data of the pages of the run.
+        :type pages_data: bytes or bytearray
+
+        :returns: A hex string.
+        :rtype: str
+        """
+        h = hashlib.sha256()
+        h.update(f"{memory_space}/{start_page_index}/".encode())
+        h.update(pages_data)
+        return h.hexdigest()
+
+    def __read_records(self) -> list:
+        """Returns the records in the journal file. Partially written lines are ignored."""
+        if not os.path.exists(self.__file_path):
+            return []
+        records = []
+        with open(self.__file_path, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass
+        return records
+
+    def completed_pages(self, memory_space: str, image_hash: str) -> Set[int]:
+        """Returns the pages that were recorded as programmed with the given image.
+
+        :param memory_space: The name of the memory space, ``"NVM"`` or ``"EEPROM"``.
+        :type memory_space: str
+
+        :param image_hash: The image hash, as returned by ``image_hash()``.
+        :type image_hash: str
+
+        :returns: The indexes of the recorded pages.
+        :rtype: Set[int]
+        """
+        return set(
+            r["page"]
+            for r in self.__read_records()
+            if r.get("space") == memory_space and r.get("hash") == image_hash
+        )
+
+    def record_page(self, memory_space: str, image_hash: str, page_index: int) -> None:
+        """Records that a page was programmed with the given image.
+
+        :param memory_space: The name of the memory space, ``"NVM"`` or ``"EEPROM"``.
+        :type memory_space: str
+
+        :param image_hash: The image hash, as returned by ``image_hash()``.
+        :type image_hash: str
+
+        :param page_index: The index of the page, in the range [0, 15].
+        :type page_index: int
+
+        :returns: None
+        """
+        assert 0 <= page_index <= 15
+        record = {
+            "space": memory_space,
+            "hash": image_hash,
+            "page": page_index,
+            "time": time.time(),
+        }
+        with open(self.__file_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def clear(self, memory_space: str, image_hash: str) -> None:
+        """Removes the records of the given image, deleting the file if no records remain.
+
+        :param memory_space: The name of the memory space, ``"NVM"`` or ``"EEPROM"``.
+        :type memory_space: str
+
+        :param image_hash: The image hash, as returned by ``image_hash()``.
+        :type image_hash: str
+
+        :returns: None
+        """
+        records = [
+            r
+            for r in self.__read_records()
+            if not (r.get("space") == memory_space and r.get("hash") == image_hash)
+        ]
+        if not records:
+            if os.path.exists(self.__file_path):
+                os.remove(self.__file_path)
+            return
+        with open(self.__file_path, "w") as f:
+            for r in records:
+                f.write(json.dumps(r) + "\n")
@@ -0,0 +1,153 @@
+"""Apply-now, persist-later reconfiguration of GreenPak devices."""
+
+from greenpak.driver import GreenpakDriver, GreenpakError
+import greenpak.devices as devices
+from concurrent.futures import Future, CancelledError
+from typing import Optional
+import threading
+
+
+class NvmCommit:
+    """A background commit of a configuration to the NVM of a device, as started by
+    ``apply_and_persist()``.
+
+    The commit programs the NVM pages that differ from the configuration, one page at a
+    time. Its outcome is reported by ``future``, whose result is the number of pages
+    programmed. A commit that was cancelled before it completed sets a
+    ``concurrent.futures.CancelledError`` exception. A cancelled commit may leave the NVM
+    with a mix of old and new pages, so the commit should be repeated before the device
+    is reset or power cycled.
+
+    The commit runs in a non-daemon thread, so the interpreter waits for a running commit
+    to complete before exiting, rather than stopping it between a page erase and write.
+
+    The commit uses a ``GreenpakDriver.clone()`` of the given driver, so it keeps the
+    control code and settings that the driver had when the commit was created, and the
+    device shouldn't be reset or moved to another control code until the commit is done.
+    """
+
+    def __init__(self, gp_driver: GreenpakDriver, image: bytes):
+        assert isinstance(gp_driver, GreenpakDriver)
+        assert len(image) == 256
+        self.__gp_driver = gp_driver.clone()
+        self.__image = bytes(image)
+        # Guards the cancel state, such that a cancel either stops the commit before a
+        # page or is rejected once the last page started.
+        self.__cancel_lock = threading.Lock()
+        self.__cancel_requested = False
+        self.__cancellable = True
+        self.future: Future = Future()
+        self.__thread = threading.Thread(
+            target=self.__run, name="greenpak-nvm-commit", daemon=False
+        )
+
+    def start(self) -> None:
+        """Starts the commit. Called by ``apply_and_persist()``."""
+        self.future.set_running_or_notify_cancel()
+        self.__thread.start()
+
+    def __run(self) -> None:
+        try:
+            self.future.set_result(self.__commit())
+        except BaseException as e:
+            self.future.set_exception(e)
+        finally:
+            with self.__cancel_lock:
+                self.__cancellable = False
+
+    def __start_step(self, programmed: int, last: bool) -> None:
+        """Raises a ``CancelledError`` if a cancel was requested. Otherwise, if this is the
+        last step of the commit, the commit can no longer be cancelled."""
+        with self.__cancel_lock:
+            if self.__cancel_requested:
+                raise CancelledError(f"NVM commit cancelled after {programmed} pages.")
+            if last:
+                self.__cancellable = False
+
+    def __commit(self) -> int:
+        ro_pages = devices.device_type_descriptor(
+            self.__gp_driver.get_device_type()
+        ).ro_nvm_pages
+        current_image = self.__gp_driver.read_nvm_bytes(0, 256)
+        page_slices = [slice(i << 4, (i + 1) << 4) for i in range(16)]
+        pending_pages = [
+            i
+            for i in range(16)
+            if i not in ro_pages
+            and current_image[page_slices[i]] != self.__image[page_slices[i]]
+        ]
+        if not pending_pages:
+            self.__start_step(0, True)
+        for n, page_index in enumerate(pending_pages):
+            self.__start_step(n, n + 1 == len(pending_pages))
+            self.__gp_driver.program_nvm_pages(
+                page_index, self.__image[page_slices[page_index]]
+            )
+        return len(pending_pages)
+
+    def cancel(self) -> bool:
+        """Requests the commit to stop before its next page.
+
+        :returns: True if the commit will stop before completing, False if it already
+            completed or started its last page.
+        :rtype: bool
+        """
+        with self.__cancel_lock:
+            if not self.__cancellable:
+                return False
+            self.__cancel_requested = True
+            return True
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Waits for the commit to complete.
+
+        :param timeout: The max wait time in seconds, or None to wait with no limit.
+        :type timeout: float
+
+        :returns: The number of NVM pages programmed. Raises the error of a failed commit,
+            a ``concurrent.futures.CancelledError`` if the commit was cancelled, or a
+            ``TimeoutError`` if the timeout expired.
+        :rtype: int
+        """
+        return self.future.result(timeout)
+
+    def done(self) -> bool:
+        """Returns True if the commit completed, successfully or not."""
+        return self.future.done()
+
+
+def apply_and_persist(
+    gp_driver: GreenpakDriver,
+    image: bytes | bytearray,
+    current_register_image: Optional[bytes | bytearray] = None,
+) -> NvmCommit:
+    """Applies a configuration to a device immediately and commits it to the NVM in the
+    background.
+
+    The configuration is loaded to the REGISTER space with
+    ``GreenpakDriver.load_register_image()``, so it's active when this function returns,
+    and a background ``NvmCommit`` then programs the changed NVM pages. No reset is needed.
+    The control code byte of the REGISTER space is not changed, so a control code change in
+    the image takes effect only on the next reset.
+
+    The driver serializes the device operations of the commit with those of the caller, so
+    the driver can be used while the commit is in progress, but operations may be delayed by
+    the programming of a page.
+
+    :param gp_driver: The driver of the device.
+    :type gp_driver: GreenpakDriver
+
+    :param image: The 256 bytes configuration.
+    :type image: bytes | bytearray
+
+    :param current_register_image: The known current content of the REGISTER space, or None
+        to read it from the device.
+    :type current_register_image: bytes | bytearray | None
+
+    :returns: The started commit.
+    :rtype: NvmCommit
+    """
+    gp_driver.load_register_image(image, current_register_image)
+    commit = NvmCommit(gp_driver, bytes(image))
+    commit.start()
+    return commit
@@ -0,0 +1,303 @@
+"""Planning and cost estimation of GreenPak programming jobs."""
+
+from greenpak.driver import GreenpakDriver
+from greenpak.timing import TimingProfile
+from greenpak.image import GreenpakImage
+import greenpak.devices as devices
+from enum import Enum
+from typing import Optional, List, Tuple
+import time
+
+
+class PageAction(Enum):
+    """The planned action for a NVM or EEPROM page."""
+
+    # The page already has the target data.
+    SKIP = 1
+    # The page is erased (all zeros), or the driver is in skip erase mode and the target
+    # only sets bits, so the page only needs to be written.
+    WRITE = 2
+    # The page needs to be erased and written.
+    ERASE_WRITE = 3
+    # The page is read-only and is not programmed.
+    READ_ONLY = 4
+
+
+def measure_cost_model(gp_driver: GreenpakDriver, iterations: int = 20) -> Tuple[float, float]:
+    """Measures the transaction cost model of the I2C driver of a GreenPak driver and sets
+    it with ``GreenPakI2cInterface.gp_set_cost_model()``, so it's used by the estimates of
+    ``plan_programming()`` and by the span coalescing of the driver.
+
+    Times 1 byte and 256 bytes reads of the REGISTER space of the driver's device.
+
+    :param gp_driver: A driver of a responding device.
+    :type gp_driver: GreenpakDriver
+
+    :param iterations: The number of reads of each size.
+    :type iterations: int
+
+    :returns: The measured (transaction_secs, byte_secs).
+    :rtype: Tuple[float, float]
+    """
+    assert iterations > 0
+    times = []
+    for n in (1, 256):
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            gp_driver.read_register_bytes(0, n)
+        times.append((time.perf_counter() - start_time) / iterations)
+    byte_secs = max(0.0, (times[1] - times[0]) / 255)
+    transaction_secs = max(0.0, times[0] - byte_secs)
+    gp_driver.get_i2c_driver().gp_set_cost_model(transaction_secs, byte_secs)
+    return (transaction_secs, byte_secs)
+
+
+class ProgrammingPlan:
+    """An explicit plan of a programming job, as computed by ``plan_programming()``.
+
+    ``nvm_actions`` and ``eeprom_actions`` have a ``PageAction`` per page, or are None if the
+    space is not programmed. The estimates cover the execution of the plan with ``execute()``,
+    not the reads that were done to compute it. Transaction times are estimated with a
+    (transaction_secs, byte_secs) cost model, as returned by
+    ``GreenPakI2cInterface.gp_cost_model()``, and ``reset_scan_codes`` is the number of
+    control codes that the reset scans for other devices before resetting the device.
+    """
+
+    def __init__(
+        self,
+        nvm_image: Optional[bytes],
+        eeprom_image: Optional[bytes],
+        nvm_actions: Optional[List[PageAction]],
+        eeprom_actions: Optional[List[PageAction]],
+        cost_model: Tuple[float, float],
+        skip_erase: bool = False,
+        timing_profile: Optional[TimingProfile] = None,
+        reset_scan_codes: int = 0,
+    ):
+        self.nvm_image: Optional[bytes] = nvm_image
+        self.eeprom_image: Optional[bytes] = eeprom_image
+        self.nvm_actions: Optional[List[PageAction]] = nvm_actions
+        self.eeprom_actions: Optional[List[PageAction]] = eeprom_actions
+        # Whether WRITE actions of pages that are not erased rely on skip erase mode.
+        # execute() programs in this mode regardless of the driver's mode.
+        self.skip_erase: bool = skip_erase
+        # A reset is needed to apply a new NVM configuration.
+        self.reset_required: bool = bool(
+            nvm_actions
+            and any(a in (PageAction.WRITE, PageAction.ERASE_WRITE) for a in nvm_actions)
+        )
+        self.transaction_count: int = 0
+        self.estimated_secs: float = 0.0
+        self.__estimate(
+            cost_model,
+            timing_profile if timing_profile is not None else TimingProfile(""),
+            reset_scan_codes,
+        )
+
+    def __estimate(
+        self,
+        cost_model: Tuple[float, float],
+        timing_profile: TimingProfile,
+        reset_scan_codes: int,
+    ) -> None:
+        """Computes the transaction count and time, per the steps of the driver's page
+        programming and reset."""
+        transaction_secs, byte_secs = cost_model
+
+        def transaction_time(n: int) -> float:
+            return transaction_secs + n * byte_secs
+
+        read_page = transaction_time(16)
+        for actions in (self.nvm_actions, self.eeprom_actions):
+            for action in actions or []:
+                if action not in (PageAction.WRITE, PageAction.ERASE_WRITE):
+                    continue
+                # Read, write, write verify.
+                self.transaction_count += 3
+                self.estimated_secs += 2 * read_page + transaction_time(16)
+                self.estimated_secs += timing_profile.write_secs
+                if action == PageAction.ERASE_WRITE:
+                    # Erase, erase verify.
+                    self.transaction_count += 2
+                    self.estimated_secs += transaction_time(1) + read_page
+                    self.estimated_secs += timing_profile.erase_secs
+        if self.reset_required:
+            # Control code read, a probe per scanned control code, reset, and at least one
+            # poll of the 4 device addresses.
+            self.transaction_count += 6 + reset_scan_codes
+            self.estimated_secs += 2 * transaction_time(1)
+            self.estimated_secs += (4 + reset_scan_codes) * transaction_time(0)
+            self.estimated_secs += timing_profile.reset_secs
+
+    def pages(self, memory_space: str, action: PageAction) -> List[int]:
+        """Returns the indexes of the pages with the given action.
+
+        :param memory_space: ``"NVM"`` or ``"EEPROM"``.
+        :type memory_space: str
+
+        :param action: The page action to select.
+        :type action: PageAction
+
+        :returns: A sorted list of page indexes.
+        :rtype: List[int]
+        """
+        actions = {"NVM": self.nvm_actions, "EEPROM": self.eeprom_actions}[memory_space]
+        return [i for i, a in enumerate(actions or []) if a == action]
+
+    def describe(self) -> str:
+        """Returns a human readable summary of the plan."""
+        lines = []
+        for space in ("NVM", "EEPROM"):
+            for action in PageAction:
+                pages = self.pages(space, action)
+                if pages:
+                    lines.append(f"{space} {action.name.lower()}: {pages}")
+        lines.append(f"Reset required: {self.reset_required}")
+        lines.append(f"Transactions: {self.transaction_count}")
+        lines.append(f"Estimated time: {self.estimated_secs:.3f} secs")
+        return "\n".join(lines)
+
+    def execute(self, gp_driver: GreenpakDriver, reset: bool = True) -> None:
+        """Executes the plan by programming the pages that need it.
+
+        The driver is expected to point to the same device that the plan was computed for.
+        The pages are programmed in the ``skip_erase`` mode of the plan, and the skip erase
+        mode of the driver is restored when done.
+
+        :param gp_driver: The driver of the device to program.
+        :type gp_driver: GreenpakDriver
+
+        :param reset: If True and the plan requires a reset, reset the device at the end.
+        :type reset: bool
+
+        :returns: None
+        """
+        driver_skip_erase = gp_driver.get_skip_erase()
+        gp_driver.set_skip_erase(self.skip_erase)
+        try:
+            for image, actions, program_method in (
+                (self.nvm_image, self.nvm_actions, gp_driver.program_nvm_pages),
+                (self.eeprom_image, self.eeprom_actions, gp_driver.program_eeprom_pages),
+            ):
+                for i, action in enumerate(actions or []):
+                    if action in (PageAction.WRITE, PageAction.ERASE_WRITE):
+                        program_method(i, image[i << 4 : (i + 1) << 4])
+        finally:
+            gp_driver.set_skip_erase(driver_skip_erase)
+        if reset and self.reset_required:
+            gp_driver.reset_device()
+
+
+def _as_image(
+    data: bytes | bytearray | GreenpakImage, device_type: str, memory_space: str
+) -> GreenpakImage:
+    """Returns data as an image, as is if it's already an image."""
+    if isinstance(data, GreenpakImage):
+        return data
+    return GreenpakImage(data, device_type, memory_space)
+
+
+def _page_actions(
+    target: GreenpakImage, current: GreenpakImage, ro_pages: List[int], skip_erase: bool
+) -> List[PageAction]:
+    """Returns the actions of the 16 pages of a memory space."""
+    result = []
+    for i in range(16):
+        if i in ro_pages:
+            result.append(PageAction.READ_ONLY)
+        elif current.page(i) == target.page(i):
+            result.append(PageAction.SKIP)
+        elif not any(current.page(i)):
+            result.append(PageAction.WRITE)
+        elif skip_erase and all(
+            (c & ~t) == 0 for c, t in zip(current.page(i), target.page(i))
+        ):
+            result.append(PageAction.WRITE)
+        else:
+            result.append(PageAction.ERASE_WRITE)
+    return result
+
+
+def plan_programming(
+    gp_driver: GreenpakDriver,
+    nvm_image: Optional[bytes | GreenpakImage] = None,
+    eeprom_image: Optional[bytes | GreenpakImage] = None,
+    current_nvm: Optional[bytes | GreenpakImage] = None,
+    current_eeprom: Optional[bytes | GreenpakImage] = None,
+) -> ProgrammingPlan:
+    """Computes the plan and the estimated cost of programming a device.
+
+    The current content of each space that is programmed is taken from ``current_nvm`` and
+    ``current_eeprom`` if given, e.g. from a previous read, or is read from the device with
+    a single bulk read. Images and current contents may also be given as ``GreenpakImage``.
+    Times are estimated with the ``gp_cost_model()`` of the driver's I2C driver, see
+    ``measure_cost_model()``.
+
+    :param gp_driver: The driver of the device. Its device type determines the read-only pages
+        and the timing profile, and its skip erase mode determines which pages need an erase.
+    :type gp_driver: GreenpakDriver
+
+    :param nvm_image: The target 256 bytes NVM configuration, or None to not program the NVM.
+    :type nvm_image: bytes, bytearray or GreenpakImage
+
+    :param eeprom_image: The target 256 bytes EEPROM data, or None to not program the EEPROM.
+    :type eeprom_image: bytes, bytearray or GreenpakImage
+
+    :param current_nvm: The current 256 bytes of the NVM, or None to read them from the device.
+    :type current_nvm: bytes, bytearray or GreenpakImage
+
+    :param current_eeprom: The current 256 bytes of the EEPROM, or None to read them from the device.
+    :type current_eeprom: bytes, bytearray or GreenpakImage
+
+    :returns: The programming plan.
+    :rtype: ProgrammingPlan
+    """
+    assert isinstance(gp_driver, GreenpakDriver)
+    device_type = gp_driver.get_device_type()
+    descriptor = devices.device_type_descriptor(device_type)
+    ro_nvm_pages = descriptor.ro_nvm_pages
+    skip_erase = gp_driver.get_skip_erase()
+    nvm_actions = None
+    if nvm_image is not None:
+        assert len(nvm_image) == 256
+        if current_nvm is None:
+            current_nvm = gp_driver.read_nvm_bytes(0, 256)
+        assert len(current_nvm) == 256
+        nvm_actions = _page_actions(
+            _as_image(nvm_image, device_type, "NVM"),
+            _as_image(current_nvm, device_type, "NVM"),
+            ro_nvm_pages,
+            skip_erase,
+        )
+    eeprom_actions = None
+    if eeprom_image is not None:
+        assert len(eeprom_image) == 256
+        if current_eeprom is None:
+            current_eeprom = gp_driver.read_eeprom_bytes(0, 256)
+        assert len(current_eeprom) == 256
+        eeprom_actions = _page_actions(
+            _as_image(eeprom_image, device_type, "EEPROM"),
+            _as_image(current_eeprom, device_type, "EEPROM"),
+            [],
+            skip_erase,
+        )
+    reset_scan_codes = 0
+    if nvm_image is not None:
+        # As in GreenpakDriver.reset_device(), other control codes are scanned only if the
+        # new control code setting doesn't allow the current control code.
+        control_byte = nvm_image[descriptor.control_code_addr]
+        external_mask = control_byte >> 4
+        internal_value = control_byte & 0x0F & ~external_mask
+        allowed = [code for code in range(16) if code & ~external_mask == internal_value]
+        if gp_driver.get_device_control_code() not in allowed:
+            reset_scan_codes = len(allowed)
+    return ProgrammingPlan(
+        None if nvm_image is None else bytes(nvm_image),
+        None if eeprom_image is None else bytes(eeprom_image),
+        nvm_actions,
+        eeprom_actions,
+        gp_driver.get_i2c_driver().gp_cost_model(),
+        skip_erase,
+        gp_driver.get_timing_profile(),
+        reset_scan_codes,
+    )
@@ -0,0 +1,273 @@
+"""Remote access to a GreenPak I2C bus over TCP.
+
+A ``GreenPakI2cServer`` runs on the host that has the I2C bus, e.g. a Raspberry Pi with a
+``GreenPakSMBusAdapter``, and exposes its I2C driver. A ``GreenPakRemoteI2c`` is an I2C driver
+that executes the transactions on a server. Each request carries a batch of operations, as
+passed to ``GreenPakI2cInterface.gp_batch()``, and the ``GreenpakDriver`` programs a page,
+including its erase, write, waits and verification, with a single batch, so a page costs a
+single network round trip.
+
+The protocol has no authentication or encryption and should be used only on trusted networks.
+"""
+
+from greenpak.i2c import GreenPakI2cInterface
+from typing import List, Tuple, Optional
+from typing_extensions import override
+import socket
+import socketserver
+import struct
+import threading
+
+# Message framing: the length of the message body.
+_LENGTH = struct.Struct("<I")
+# The number of operations of a request, or of results of a response.
+_COUNT = struct.Struct("<H")
+# A response count that marks an error response, followed by the UTF-8 error message.
+_ERROR_COUNT = 0xFFFF
+# Operation header: code, i2c address, start address, byte count.
+_OP = struct.Struct("<cBBH")
+# Sleep operation argument, in seconds.
+_SLEEP = struct.Struct("<d")
+
+_OP_CODES = {
+    "write": b"W",
+    "write_ignore": b"I",
+    "read": b"R",
+    "expect": b"E",
+    "sleep": b"S",
+}
+
+
+class GreenPakRemoteError(Exception):
+    """An error that a ``GreenPakI2cServer`` reported while executing a batch."""
+
+
+def _encode_ops(ops: List[Tuple]) -> bytes:
+    assert len(ops) < _ERROR_COUNT, len(ops)
+    parts = [_COUNT.pack(len(ops))]
+    for op in ops:
+        code = _OP_CODES[op[0]]
+        if code == b"S":
+            parts.append(_OP.pack(code, 0, 0, 0))
+            parts.append(_SLEEP.pack(op[1]))
+        elif code == b"R":
+            parts.append(_OP.pack(code, op[1], op[2], op[3]))
+        else:
+            parts.append(_OP.pack(code, op[1], op[2], len(op[3])))
+            parts.append(bytes(op[3]))
+    return b"".join(parts)
+
+
+def _decode_ops(body: bytes) -> List[Tuple]:
+    (count,) = _COUNT.unpack_from(body, 0)
+    offset = _COUNT.size
+    names = {v: k for k, v in _OP_CODES.items()}
+    ops = []
+    for _ in range(count):
+        code, i2c_addr, start, n = _OP.unpack_from(body, offset)
+        offset += _OP.size
+        if code == b"S":
+            (secs,) = _SLEEP.unpack_from(body, offset)
+            offset += _SLEEP.size
+            ops.append(("sleep", secs))
+        elif code == b"R":
+            ops.append(("read", i2c_addr, start, n))
+        else:
+            ops.append((names[code], i2c_addr, start, bytearray(body[offset : offset + n])))
+            offset += n
+    return ops
+
+
+def _encode_results(results: List[bool | bytearray | None]) -> bytes:
+    parts = [_COUNT.pack(len(results))]
+    for result in results:
+        if isinstance(result, (bytes, bytearray)):
+            parts.append(_COUNT.pack(len(result) + 1))
+            parts.append(bytes(result))
+        else:
+            # 0 for a failure, 1 for success without data.
+            parts.append(_COUNT.pack(0 if not result else 1))
+    return b"".join(parts)
+
+
+def _encode_error(error: Exception) -> bytes:
+    return _COUNT.pack(_ERROR_COUNT) + f"{type(error).__name__}: {error}".encode()
+
+
+def _decode_results(body: bytes, ops: List[Tuple]) -> List[bool | bytearray | None]:
+    (count,) = _COUNT.unpack_from(body, 0)
+    offset = _COUNT.size
+    if count == _ERROR_COUNT:
+        raise GreenPakRemoteError(body[offset:].decode(errors="replace"))
+    results = []
+    for op in ops[:count]:
+        (n,) = _COUNT.unpack_from(body, offset)
+        offset += _COUNT.size
+        if op[0] == "read":
+            results.append(bytearray(body[offset : offset + n - 1]) if n else None)
+            offset += max(0, n - 1)
+        else:
+            results.append(n != 0)
+    return results
+
+
+def _send_message(sock: socket.socket, body: bytes) -> None:
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+
+def _recv_exactly(sock: socket.socket, n: int) -> Optional[bytes]:
+    """Returns n bytes, or None if the connection was closed before the first byte."""
+    buffer = bytearray(n)
+    view = memoryview(buffer)
+    received = 0
+    while received < n:
+        k = sock.recv_into(view[received:])
+        if k == 0:
+            if received == 0:
+                return None
+            raise ConnectionError("Connection closed mid message.")
+        received += k
+    return bytes(buffer)
+
+
+def _recv_message(sock: socket.socket) -> Optional[bytes]:
+    header = _recv_exactly(sock, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    return _recv_exactly(sock, length) if length else b""
+
+
+class GreenPakI2cServer:
+    """A TCP server that executes the operation batches of ``GreenPakRemoteI2c`` clients on a
+    local I2C driver. Batches of concurrent clients are executed one at a time. A batch that
+    can't be decoded or executed is answered with an error response, which the client raises
+    as a ``GreenPakRemoteError``, and the connection keeps serving.
+
+    :param i2c_driver: The local I2C driver.
+    :type i2c_driver: GreenPakI2cInterface
+
+    :param host: The interface to listen on. The default accepts only local connections.
+    :type host: str
+
+    :param port: The port to listen on, or 0 for an arbitrary free port. See ``address()``.
+    :type port: int
+    """
+
+    def __init__(self, i2c_driver: GreenPakI2cInterface, host: str = "127.0.0.1", port: int = 0):
+        assert isinstance(i2c_driver, GreenPakI2cInterface)
+        i2c_lock = threading.Lock()
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                while True:
+                    try:
+                        body = _recv_message(self.request)
+                    except OSError:
+                        return
+                    if body is None:
+                        return
+                    try:
+                        ops = _decode_ops(body)
+                        with i2c_lock:
+                            response = _encode_results(i2c_driver.gp_batch(ops))
+                    except Exception as e:
+                        response = _encode_error(e)
+                    try:
+                        _send_message(self.request, response)
+                    except OSError:
+                        return
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.__server = Server((host, port), Handler)
+        self.__thread: Optional[threading.Thread] = None
+
+    def address(self) -> Tuple[str, int]:
+        """Returns the (host, port) that the server listens on."""
+        return self.__server.server_address[:2]
+
+    def start(self) -> None:
+        """Starts serving in a background thread."""
+        assert self.__thread is None
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, name="greenpak-i2c-server", daemon=True
+        )
+        self.__thread.start()
+
+    def serve_forever(self) -> None:
+        """Serves in the calling thread until ``stop()`` is called from another thread."""
+        self.__server.serve_forever()
+
+    def stop(self) -> None:
+        """Stops serving and closes the listening socket."""
+        self.__server.shutdown()
+        self.__server.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+
+class GreenPakRemoteI2c(GreenPakI2cInterface):
+    """A GreenPakI2cInterface implementation that executes the transactions on a
+    ``GreenPakI2cServer``.
+
+    :param host: The host of the server.
+    :type host: str
+
+    :param port: The port of the server.
+    :type port: int
+
+    :param timeout_secs: The socket timeout. Should exceed the longest batch, including its
+        sleeps.
+    :type timeout_secs: float
+
+    A connection or protocol error, such as a timeout, closes the connection, since the
+    response of the failed batch may still arrive, and later calls raise a
+    ``ConnectionError``. Errors that the server reports are raised as a
+    ``GreenPakRemoteError`` and keep the connection open.
+    """
+
+    # A network round trip per call.
+    _GP_TRANSACTION_SECS = 0.005
+
+    def __init__(self, host: str, port: int, timeout_secs: float = 10.0):
+        super().__init__()
+        print(f"Creating an i2c {type(self).__name__} driver.")
+        self.__sock = socket.create_connection((host, port), timeout=timeout_secs)
+        self.__sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.__broken = False
+
+    def close(self) -> None:
+        """Closes the connection to the server."""
+        self.__broken = True
+        self.__sock.close()
+
+    @override
+    def gp_batch(self, ops: List[Tuple]) -> List[bool | bytearray | None]:
+        if self.__broken:
+            raise ConnectionError("Connection to the server is closed.")
+        request = _encode_ops(ops)
+        try:
+            _send_message(self.__sock, request)
+            body = _recv_message(self.__sock)
+            if body is None:
+                raise ConnectionError("Connection closed by the server.")
+            return _decode_results(body, ops)
+        except GreenPakRemoteError:
+            raise
+        except Exception:
+            # The connection is out of sync with the server, e.g. after a timeout.
+            self.close()
+            raise
+
+    @override
+    def gp_read(self, i2c_addr: int, start: int, byte_count: int) -> bytearray | None:
+        return self.gp_batch([("read", i2c_addr, start, byte_count)])[0]
+
+    @override
+    def gp_write(self, i2c_addr: int, start: int, data: bytearray) -> bool:
+        return self.gp_batch([("write", i2c_addr, start, data)])[0]
@@ -0,0 +1,244 @@
+"""High rate sampling of GreenPak REGISTER space ranges into a ring buffer.
+
+The NumPy exports require the optional ``numpy`` package.
+"""
+
+from greenpak.driver import GreenpakDriver
+from typing import Optional, List, Tuple, Dict, Any
+from array import array
+import time
+
+
+class NpySampleFile:
+    """A memory mapped ``.npy`` file that samples are appended to.
+
+    The file holds a 1D array of records with the fields ``time`` (float64, seconds since
+    the epoch) and ``data`` (uint8, ``sample_size`` bytes). The file is preallocated for
+    ``max_samples`` records and is truncated to the actual number of samples on ``close()``.
+
+    :param file_path: The path of the output file.
+    :type file_path: str
+
+    :param sample_size: The number of data bytes per sample.
+    :type sample_size: int
+
+    :param max_samples: The max number of samples that the file can hold.
+    :type max_samples: int
+    """
+
+    def __init__(self, file_path: str, sample_size: int, max_samples: int):
+        import numpy as np
+        from numpy.lib.format import open_memmap
+
+        assert sample_size > 0
+        assert max_samples > 0
+        self.__file_path = file_path
+        self.__dtype = np.dtype([("time", "<f8"), ("data", "u1", (sample_size,))])
+        self.__array = open_memmap(
+            file_path, mode="w+", dtype=self.__dtype, shape=(max_samples,)
+        )
+        self.__header_len = self.__array.offset
+        self.__count = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def append(self, times: Any, data: Any) -> int:
+        """Appends samples, as returned by ``RegisterSampler.drain()``.
+
+        :returns: The number of samples appended, which is less than ``len(times)`` if the
+            file is full.
+        :rtype: int
+        """
+        n = min(len(times), len(self.__array) - self.__count)
+        self.__array["time"][self.__count : self.__count + n] = times[:n]
+        self.__array["data"][self.__count : self.__count + n] = data[:n]
+        self.__count += n
+        return n
+
+    def close(self) -> None:
+        """Flushes the file and truncates it to the number of samples appended."""
+        import numpy as np
+
+        self.__array.flush()
+        del self.__array
+        # Rewrite the header with the actual shape, padded to the original header length
+        # so the data offset doesn't change.
+        descr = np.lib.format.dtype_to_descr(self.__dtype)
+        header = f"{{'descr': {descr!r}, 'fortran_order': False, 'shape': ({self.__count},), }}"
+        prefix_len = 10  # Magic string, version and header length, for version 1.0.
+        header = header.ljust(self.__header_len - prefix_len - 1) + "\n"
+        with open(self.__file_path, "r+b") as f:
+            f.seek(prefix_len)
+            f.write(header.encode("latin1"))
+            f.truncate(self.__header_len + self.__count * self.__dtype.itemsize)
+
+
+class RegisterSampler:
+    """Samples ranges of the REGISTER space as fast as the adapter allows.
+
+    Each sample is the concatenation of the configured ranges, stored with a host timestamp
+    in a preallocated ring buffer. When the ring buffer is full, new samples overwrite the
+    oldest samples that were not drained yet, and are counted as overwritten.
+
+    :param gp_driver: The driver of the device to sample.
+    :type gp_driver: GreenpakDriver
+
+    :param ranges: A list of (start_address, n) REGISTER space ranges to read per sample.
+    :type ranges: List[Tuple[int, int]]
+
+    :param capacity: The number of samples that the ring buffer holds.
+    :type capacity: int
+    """
+
+    def __init__(
+        self,
+        gp_driver: GreenpakDriver,
+        ranges: List[Tuple[int, int]],
+        capacity: int = 4096,
+    ):
+        assert isinstance(gp_driver, GreenpakDriver)
+        assert len(ranges) > 0
+        for start, n in ranges:
+            assert 0 <= start <= 255
+            assert 0 < n
+            assert start + n <= 256
+        assert capacity > 0
+        self.__gp_driver = gp_driver
+        self.__ranges = list(ranges)
+        self.__sample_size = sum(n for _, n in ranges)
+        self.__capacity = capacity
+        self.__data = bytearray(capacity * self.__sample_size)
+        self.__times = array("d", bytes(8 * capacity))
+        # Total samples taken, and total samples drained or overwritten.
+        self.__count = 0
+        self.__drained = 0
+        self.__overwritten = 0
+        self.__missed_ticks = 0
+        self.__run_samples = 0
+        self.__run_secs = 0.0
+
+    def sample_size(self) -> int:
+        """Returns the number of data bytes per sample."""
+        return self.__sample_size
+
+    def sample(self) -> None:
+        """Takes a single sample into the ring buffer."""
+        slot = self.__count % self.__capacity
+        offset = slot * self.__sample_size
+        self.__times[slot] = time.time()
+        with memoryview(self.__data) as view:
+            for start, n in self.__ranges:
+                self.__gp_driver.read_register_into(start, view[offset : offset + n])
+                offset += n
+        self.__count += 1
+        if self.__count - self.__drained > self.__capacity:
+            self.__drained += 1
+            self.__overwritten += 1
+
+    def run(
+        self,
+        num_samples: Optional[int] = None,
+        duration_secs: Optional[float] = None,
+        rate_hz: Optional[float] = None,
+        sink: Optional[NpySampleFile] = None,
+    ) -> None:
+        """Takes samples until ``num_samples`` were taken or ``duration_secs`` passed.
+
+        :param num_samples: The number of samples to take, or None for no limit.
+        :type num_samples: int
+
+        :param duration_secs: The max sampling time, or None for no limit.
+        :type duration_secs: float
+
+        :param rate_hz: The target sample rate, or None to sample as fast as possible. Sample
+            times that passed while a previous sample was taken are skipped and counted as
+            missed.
+        :type rate_hz: float
+
+        :param sink: An optional file that the samples are drained to, such that they are
+            not overwritten in the ring buffer.
+        :type sink: NpySampleFile
+
+        :returns: None
+        """
+        assert num_samples is not None or duration_secs is not None
+        assert rate_hz is None or rate_hz > 0
+        period = None if rate_hz is None else 1.0 / rate_hz
+        start_time = time.perf_counter()
+        end_time = None if duration_secs is None else start_time + duration_secs
+        next_time = start_time
+        taken = 0
+        while num_samples is None or taken < num_samples:
+            now = time.perf_counter()
+            if end_time is not None and now >= end_time:
+                break
+            if period is not None:
+                if now < next_time:
+                    time.sleep(next_time - now)
+                    continue
+                missed = int((now - next_time) / period)
+                self.__missed_ticks += missed
+                next_time += (missed + 1) * period
+            self.sample()
+            taken += 1
+            self.__run_samples += 1
+            if sink is not None and self.pending() >= self.__capacity // 2:
+                sink.append(*self.drain())
+        self.__run_secs += time.perf_counter() - start_time
+        if sink is not None:
+            sink.append(*self.drain())
+
+    def pending(self) -> int:
+        """Returns the number of samples in the ring buffer that were not drained yet."""
+        return self.__count - self.__drained
+
+    def __export(self, first: int, n: int) -> Tuple[Any, Any]:
+        """Returns the timestamps and data of the n samples starting at the given total
+        sample index, as numpy arrays."""
+        import numpy as np
+
+        slots = (np.arange(first, first + n) % self.__capacity).astype(np.intp)
+        times = np.frombuffer(self.__times, dtype=np.float64)[slots]
+        data = np.frombuffer(self.__data, dtype=np.uint8).reshape(
+            self.__capacity, self.__sample_size
+        )[slots]
+        return (times, data)
+
+    def drain(self) -> Tuple[Any, Any]:
+        """Returns and removes the samples that were not drained yet, oldest first.
+
+        :returns: A tuple with a float64 array of shape (N,) with the timestamps, in seconds
+            since the epoch, and a uint8 array of shape (N, sample_size) with the data.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        n = self.pending()
+        result = self.__export(self.__drained, n)
+        self.__drained += n
+        return result
+
+    def to_numpy(self) -> Tuple[Any, Any]:
+        """Returns all the samples that are in the ring buffer, drained or not, oldest first.
+
+        :returns: Same as ``drain()``.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        n = min(self.__count, self.__capacity)
+        return self.__export(self.__count - n, n)
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the sampling statistics.
+
+        :returns: A dict with the total ``"samples"``, the ``"rate_hz"`` achieved by
+            ``run()``, the ``"missed"`` sample times of a rate limited run, and the samples
+            ``"overwritten"`` in the ring buffer before they were drained.
+        :rtype: Dict[str, float]
+        """
+        return {
+            "samples": self.__count,
+            "rate_hz": (
+                self.__run_samples / self.__run_secs if self.__run_secs > 0 else 0.0
+            ),
+            "missed": self.__missed_ticks,
+            "overwritten": self.__overwritten,
+        }
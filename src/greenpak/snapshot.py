@@ -0,0 +1,168 @@
+"""Snapshots of the memory spaces of GreenPak devices, and their diffs."""
+
+from typing import List, Tuple, NamedTuple, Optional, TextIO
+import io
+import struct
+import time
+
+import greenpak.utils as utils
+from greenpak.image import GreenpakImage
+
+_SNAPSHOT_MAGIC = b"GPSNAP01"
+
+# Device type, control code, time.
+_SNAPSHOT_HEADER = struct.Struct("<16sBd")
+
+# The memory spaces of a snapshot, in their serialization order.
+SNAPSHOT_SPACES: Tuple[str, ...] = ("REGISTER", "NVM", "EEPROM")
+
+
+class DeviceSnapshot(NamedTuple):
+    """An immutable snapshot of the three memory spaces of a device, as returned by
+    ``GreenpakDriver.snapshot()``."""
+
+    device_type: str
+    control_code: int
+    # Seconds since the epoch.
+    time: float
+    register: bytes
+    nvm: bytes
+    eeprom: bytes
+
+    def space(self, memory_space: str) -> bytes:
+        """Returns the 256 bytes of ``"REGISTER"``, ``"NVM"`` or ``"EEPROM"``."""
+        return {"REGISTER": self.register, "NVM": self.nvm, "EEPROM": self.eeprom}[
+            memory_space
+        ]
+
+    def image(self, memory_space: str) -> GreenpakImage:
+        """Returns a memory space of the snapshot as an image."""
+        return GreenpakImage(self.space(memory_space), self.device_type, memory_space)
+
+    def to_bytes(self) -> bytes:
+        """Returns the compact binary form of the snapshot, 801 bytes."""
+        return b"".join(
+            [
+                _SNAPSHOT_MAGIC,
+                _SNAPSHOT_HEADER.pack(
+                    self.device_type.encode("ascii"), self.control_code, self.time
+                ),
+                self.register,
+                self.nvm,
+                self.eeprom,
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DeviceSnapshot":
+        """Returns the snapshot of a binary form returned by ``to_bytes()``."""
+        n = len(_SNAPSHOT_MAGIC)
+        assert data[:n] == _SNAPSHOT_MAGIC, "Not a snapshot"
+        device_type, control_code, t = _SNAPSHOT_HEADER.unpack_from(data, n)
+        n += _SNAPSHOT_HEADER.size
+        assert len(data) == n + 3 * 256, "Bad snapshot size"
+        return cls(
+            device_type.rstrip(b"\0").decode("ascii"),
+            control_code,
+            t,
+            bytes(data[n : n + 256]),
+            bytes(data[n + 256 : n + 512]),
+            bytes(data[n + 512 : n + 768]),
+        )
+
+    def save(self, file_path: str) -> None:
+        """Writes the binary form of the snapshot to a file."""
+        with open(file_path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, file_path: str) -> "DeviceSnapshot":
+        """Reads a snapshot file written by ``save()``."""
+        with open(file_path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def format(self) -> str:
+        """Returns a hex dump of the three memory spaces."""
+        parts = [
+            f"{self.device_type} control code {self.control_code}, "
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.time))}\n"
+        ]
+        for memory_space in SNAPSHOT_SPACES:
+            parts.append(f"{memory_space}:\n")
+            parts.append(utils.format_hex_dump(self.space(memory_space)))
+        return "".join(parts)
+
+
+class SnapshotDiff:
+    """The differences between two snapshots.
+
+    The differing bits of each memory space are found with a single XOR of the space as a
+    2048 bits integer, so the cost is proportional to the number of changed bits.
+
+    :param old: The old snapshot.
+    :type old: DeviceSnapshot
+
+    :param new: The new snapshot.
+    :type new: DeviceSnapshot
+    """
+
+    def __init__(self, old: DeviceSnapshot, new: DeviceSnapshot):
+        self.old: DeviceSnapshot = old
+        self.new: DeviceSnapshot = new
+        # (memory_space, bit_index) of the changed bits, in space and bit order. Bit ``i`` is
+        # bit ``i % 8`` of byte ``i // 8``, as in the GreenPAK Designer bit numbering.
+        self.changed_bits: List[Tuple[str, int]] = []
+        for memory_space in SNAPSHOT_SPACES:
+            old_data = old.space(memory_space)
+            new_data = new.space(memory_space)
+            if old_data == new_data:
+                continue
+            x = int.from_bytes(old_data, "little") ^ int.from_bytes(new_data, "little")
+            while x:
+                low_bit = x & -x
+                self.changed_bits.append((memory_space, low_bit.bit_length() - 1))
+                x ^= low_bit
+
+    def __bool__(self) -> bool:
+        return bool(self.changed_bits)
+
+    def changed_pages(self, memory_space: str) -> List[int]:
+        """Returns the sorted indexes of the pages of a memory space that have changed bits."""
+        return sorted(set(b >> 7 for s, b in self.changed_bits if s == memory_space))
+
+    def write(self, stream: TextIO) -> None:
+        """Writes a human readable form of the diff to a stream, with a line per changed
+        byte."""
+        if not self.changed_bits:
+            stream.write("No differences.\n")
+            return
+        i = 0
+        n = len(self.changed_bits)
+        while i < n:
+            memory_space, bit_index = self.changed_bits[i]
+            addr = bit_index >> 3
+            bits = []
+            while (
+                i < n
+                and self.changed_bits[i][0] == memory_space
+                and self.changed_bits[i][1] >> 3 == addr
+            ):
+                bits.append(self.changed_bits[i][1])
+                i += 1
+            old_value = self.old.space(memory_space)[addr]
+            new_value = self.new.space(memory_space)[addr]
+            stream.write(
+                f"{memory_space}/0x{addr:02x} page {addr >> 4:2d}: "
+                f"{old_value:02x} -> {new_value:02x}, bits {bits}\n"
+            )
+
+    def format(self, max_lines: Optional[int] = None) -> str:
+        """Returns the form written by ``write()``, optionally truncated to ``max_lines``."""
+        out = io.StringIO()
+        self.write(out)
+        text = out.getvalue()
+        if max_lines is not None:
+            lines = text.splitlines(keepends=True)
+            if len(lines) > max_lines:
+                text = "".join(lines[:max_lines]) + f"... {len(lines) - max_lines} more\n"
+        return text
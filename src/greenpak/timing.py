@@ -0,0 +1,127 @@
+"""Timing profiles of GreenPak device types.
+
+A timing profile holds the times that the ``GreenpakDriver`` waits for NVM and EEPROM page
+erases and writes to complete, and the expected reset time. The driver uses the profile
+that is registered for its device type, or the datasheet based defaults if none is
+registered. Profiles are measured with ``GreenpakDriver.calibrate_timing()`` and can be
+saved to and loaded from a JSON file.
+"""
+
+from typing import Dict, List
+import json
+
+
+# Time to wait for a NVM or EEPROM page erase to complete. Datasheet says 20ms max.
+ERASE_WAIT_SECS: float = 0.025
+
+# Time to wait for a NVM or EEPROM page write to complete. Datasheet says 20ms max.
+WRITE_WAIT_SECS: float = 0.025
+
+# An upper estimate of the time it takes a device to respond again after a reset. Used
+# for time estimates and to bound the polling of reset_device(), which returns as soon as
+# the device responds.
+RESET_WAIT_SECS: float = 0.1
+
+
+class TimingProfile:
+    """The timings of a device type.
+
+    :param device_type: The device type, such as ``"SLG46826"``.
+    :type device_type: str
+
+    :param erase_secs: The time to wait for a page erase to complete.
+    :type erase_secs: float
+
+    :param write_secs: The time to wait for a page write to complete.
+    :type write_secs: float
+
+    :param reset_secs: The expected time for the device to respond again after a reset.
+        ``GreenpakDriver.reset_device()`` polls until the device responds, for up to 10
+        times this time and at least ``RESET_TIMEOUT_SECS``, and time estimates use it as
+        the reset time.
+    :type reset_secs: float
+    """
+
+    def __init__(
+        self,
+        device_type: str,
+        erase_secs: float = ERASE_WAIT_SECS,
+        write_secs: float = WRITE_WAIT_SECS,
+        reset_secs: float = RESET_WAIT_SECS,
+    ):
+        assert isinstance(device_type, str)
+        assert erase_secs >= 0
+        assert write_secs >= 0
+        assert reset_secs >= 0
+        self.device_type: str = device_type
+        self.erase_secs: float = erase_secs
+        self.write_secs: float = write_secs
+        self.reset_secs: float = reset_secs
+
+    def __repr__(self) -> str:
+        return (
+            f"TimingProfile({self.device_type!r}, erase_secs={self.erase_secs:.4f}, "
+            f"write_secs={self.write_secs:.4f}, reset_secs={self.reset_secs:.4f})"
+        )
+
+    def to_dict(self) -> Dict:
+        """Returns the profile as a JSON serializable dict."""
+        return {
+            "device_type": self.device_type,
+            "erase_secs": self.erase_secs,
+            "write_secs": self.write_secs,
+            "reset_secs": self.reset_secs,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "TimingProfile":
+        """Returns the profile of a dict returned by ``to_dict()``."""
+        return cls(d["device_type"], d["erase_secs"], d["write_secs"], d["reset_secs"])
+
+
+# The registered profiles, keyed by device type.
+__PROFILES: Dict[str, TimingProfile] = {}
+
+
+def set_timing_profile(profile: TimingProfile) -> None:
+    """Registers a profile for its device type, replacing a previously registered one."""
+    assert isinstance(profile, TimingProfile)
+    __PROFILES[profile.device_type] = profile
+
+
+def clear_timing_profile(device_type: str) -> None:
+    """Removes the registered profile of a device type, if any, reverting it to the
+    default timings."""
+    __PROFILES.pop(device_type, None)
+
+
+def get_timing_profile(device_type: str) -> TimingProfile:
+    """Returns the registered profile of a device type, or a profile with the default
+    timings if none is registered."""
+    profile = __PROFILES.get(device_type)
+    return profile if profile is not None else TimingProfile(device_type)
+
+
+def registered_timing_profiles() -> List[TimingProfile]:
+    """Returns the registered profiles, sorted by device type."""
+    return [__PROFILES[k] for k in sorted(__PROFILES.keys())]
+
+
+def save_timing_profiles(file_path: str) -> None:
+    """Saves the registered profiles to a JSON file."""
+    with open(file_path, "w") as f:
+        json.dump([p.to_dict() for p in registered_timing_profiles()], f, indent=2)
+        f.write("\n")
+
+
+def load_timing_profiles(file_path: str) -> List[TimingProfile]:
+    """Loads and registers the profiles of a JSON file written by ``save_timing_profiles()``.
+
+    :returns: The loaded profiles.
+    :rtype: List[TimingProfile]
+    """
+    with open(file_path, "r") as f:
+        profiles = [TimingProfile.from_dict(d) for d in json.load(f)]
+    for profile in profiles:
+        set_timing_profile(profile)
+    return profiles
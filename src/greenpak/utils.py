@@ -2,9 +2,11 @@
 
 
 from dataclasses import dataclass
+from typing import Optional, TextIO
 import re
 from importlib import resources as impresources
 from intelhex import IntelHex
+from greenpak.image import GreenpakImage, image_data
 
 
 def read_hex_config_file(file_name: str) -> bytes:
@@ -30,18 +32,21 @@ def read_hex_config_file(file_name: str) -> bytes:
     return result
 
 
-def write_hex_config_file(file_name: str, data: bytearray | bytes) -> bytes:
+def write_hex_config_file(
+    file_name: str, data: bytearray | bytes | GreenpakImage
+) -> bytes:
     """Read GreenPak config from a hex file.
 
     :param file_name: Path to the output intelhex file.
     :type file_name: str
 
     :param data: The config bytes to write. Should have exactly 256 bytes.
-    :type data: bytearray or bytes
+    :type data: bytearray, bytes or GreenpakImage
 
     :returns: None
     """
     assert isinstance(file_name, str)
+    data = image_data(data)
     assert isinstance(data, (bytearray, bytes))
     assert len(data) == 256
     ih = IntelHex()
@@ -93,7 +98,9 @@ def read_bits_config_file(file_path: str) -> bytearray:
     return result
 
 
-def write_bits_config_file(file_name: str, data: bytearray | bytes) -> None:
+def write_bits_config_file(
+    file_name: str, data: bytearray | bytes | GreenpakImage
+) -> None:
     """Write a GreenPak SPLD config file.
 
     Writes the given configuration bytes, in the same representation as the GreenPak NVM memory,
@@ -104,8 +111,9 @@ def write_bits_config_file(file_name: str, data: bytearray | bytes) -> None:
     :type file_path: str
 
     :param data: The configuration bytes to write. ``len(data)`` is asserted to be 256.
-    :type data: bytearray or bytes
+    :type data: bytearray, bytes or GreenpakImage
     """
+    data = image_data(data)
     assert isinstance(data, (bytearray, bytes))
     assert len(data) == 256
     with open(file_name, "w") as f:
@@ -117,24 +125,25 @@ def write_bits_config_file(file_name: str, data: bytearray | bytes) -> None:
             f.write(f"{i}\t\t{bit_value}\t\t//\n")
 
 
-def hex_dump(data: bytearray | bytes, start_addr: int = 0) -> None:
-    """Print bytes in hex format.
-
-    This utility help function is useful to print binary data such
-    as GreenPak configuration bytes.
+def format_hex_dump(data: bytearray | bytes | GreenpakImage, start_addr: int = 0) -> str:
+    """Formats bytes in hex format, as printed by ``hex_dump()``.
 
-    :param data: The bytes to dump.
-    :type data: bytearray or bytes
+    :param data: The bytes to format.
+    :type data: bytearray, bytes or GreenpakImage
 
     :param start_addr: Allows to assign an index other than zero to the first byte.
     :type start_addr: int
 
-    ."""
+    :returns: The formatted lines, each terminated with a new line.
+    :rtype: str
+    """
+    data = image_data(data)
     assert isinstance(data, (bytearray, bytes)), type(data)
     assert isinstance(start_addr, int)
     assert start_addr >= 0
     end_addr = start_addr + len(data)
     row_addr = (start_addr // 16) * 16
+    lines = []
     while row_addr < end_addr:
         items = []
         for i in range(16):
@@ -146,5 +155,29 @@ def hex_dump(data: bytearray | bytes, start_addr: int = 0) -> None:
                 items.append(f"{col_space}  ")
             else:
                 items.append(f"{col_space}{data[addr - start_addr]:02x}")
-        print(f'{row_addr:02x}: {" ".join(items)}', flush=True)
+        lines.append(f'{row_addr:02x}: {" ".join(items)}\n')
         row_addr += 16
+    return "".join(lines)
+
+
+def hex_dump(
+    data: bytearray | bytes | GreenpakImage,
+    start_addr: int = 0,
+    stream: Optional[TextIO] = None,
+) -> None:
+    """Print bytes in hex format.
+
+    This utility help function is useful to print binary data such
+    as GreenPak configuration bytes.
+
+    :param data: The bytes to dump.
+    :type data: bytearray, bytes or GreenpakImage
+
+    :param start_addr: Allows to assign an index other than zero to the first byte.
+    :type start_addr: int
+
+    :param stream: The stream to write to, or None for stdout.
+    :type stream: TextIO
+
+    ."""
+    print(format_hex_dump(data, start_addr), end="", file=stream, flush=True)
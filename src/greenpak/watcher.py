@@ -0,0 +1,156 @@
+"""Polling of GreenPak REGISTER bits with callbacks on changes."""
+
+from greenpak.driver import GreenpakDriver
+from typing import Optional, List, Tuple, Dict, Callable
+import time
+
+# A watch callback, called with the address, old masked value and new masked value.
+WatchCallback = Callable[[int, int, int], None]
+
+
+class RegisterWatcher:
+    """Watches bits of the REGISTER space and calls callbacks when they change.
+
+    Each poll reads the minimal set of contiguous address ranges that cover the watched
+    addresses, so the bus load scales with what is watched. Callbacks are called only when
+    a watched bit changes. When polls find no changes, the polling period backs off
+    exponentially, up to ``max_backoff`` times the base period, and returns to the base
+    period on the next change.
+
+    :param gp_driver: The driver of the device to watch.
+    :type gp_driver: GreenpakDriver
+
+    :param rate_hz: The target polling rate when changes occur.
+    :type rate_hz: float
+
+    :param max_backoff: The max factor by which the polling period grows when idle. 1 disables
+        the backoff.
+    :type max_backoff: float
+
+    :param max_gap: Watched addresses that are up to this many unwatched bytes apart are read
+        in a single range.
+    :type max_gap: int
+    """
+
+    def __init__(
+        self,
+        gp_driver: GreenpakDriver,
+        rate_hz: float = 100,
+        max_backoff: float = 8,
+        max_gap: int = 0,
+    ):
+        assert isinstance(gp_driver, GreenpakDriver)
+        assert rate_hz > 0
+        assert max_backoff >= 1
+        assert max_gap >= 0
+        self.__gp_driver = gp_driver
+        self.__period = 1.0 / rate_hz
+        self.__max_backoff = max_backoff
+        self.__max_gap = max_gap
+        # Watch handle -> (address, mask, callback)
+        self.__watches: Dict[int, Tuple[int, int, WatchCallback]] = {}
+        self.__next_handle = 1
+        self.__ranges: List[Tuple[int, int]] = []
+        # Last value of each watched address, or None before the first poll.
+        self.__values: Optional[Dict[int, int]] = None
+        self.__stop_requested = False
+
+    def watch(self, address: int, mask: int, callback: WatchCallback) -> int:
+        """Adds a watch.
+
+        :param address: The REGISTER address of the watched byte, in the range [0, 255].
+        :type address: int
+
+        :param mask: The watched bits of the byte, non zero.
+        :type mask: int
+
+        :param callback: Called with ``(address, old_value & mask, new_value & mask)`` when
+            a watched bit changes.
+        :type callback: Callable[[int, int, int], None]
+
+        :returns: A handle for ``unwatch()``.
+        :rtype: int
+        """
+        assert 0 <= address <= 255
+        assert 0 < mask <= 255
+        handle = self.__next_handle
+        self.__next_handle += 1
+        self.__watches[handle] = (address, mask, callback)
+        self.__update_ranges()
+        return handle
+
+    def unwatch(self, handle: int) -> None:
+        """Removes a watch that was added by ``watch()``."""
+        del self.__watches[handle]
+        self.__update_ranges()
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        """Returns the (start_address, n) ranges that each poll reads."""
+        return list(self.__ranges)
+
+    def __update_ranges(self) -> None:
+        addresses = sorted(set(address for address, _, _ in self.__watches.values()))
+        ranges = []
+        for address in addresses:
+            if ranges and address - (ranges[-1][0] + ranges[-1][1]) <= self.__max_gap:
+                start = ranges[-1][0]
+                ranges[-1] = (start, address - start + 1)
+            else:
+                ranges.append((address, 1))
+        self.__ranges = ranges
+        # Newly watched addresses get their baseline on the next poll.
+        if self.__values is not None:
+            self.__values = {a: v for a, v in self.__values.items() if a in addresses}
+
+    def poll(self) -> int:
+        """Reads the watched addresses once and calls the callbacks of changed bits. The
+        first poll of an address only records its value.
+
+        :returns: The number of callbacks that were called.
+        :rtype: int
+        """
+        new_values: Dict[int, int] = {}
+        for start, n in self.__ranges:
+            data = self.__gp_driver.read_register_bytes(start, n)
+            for i in range(n):
+                new_values[start + i] = data[i]
+        old_values = self.__values if self.__values is not None else {}
+        self.__values = new_values
+        calls = 0
+        for address, mask, callback in list(self.__watches.values()):
+            if address not in old_values:
+                continue
+            old_value = old_values[address] & mask
+            new_value = new_values[address] & mask
+            if old_value != new_value:
+                callback(address, old_value, new_value)
+                calls += 1
+        return calls
+
+    def stop(self) -> None:
+        """Requests ``run()`` to return. Can be called from a callback."""
+        self.__stop_requested = True
+
+    def run(self, duration_secs: Optional[float] = None) -> None:
+        """Polls until ``stop()`` is called or ``duration_secs`` passed.
+
+        :param duration_secs: The max polling time, or None for no limit.
+        :type duration_secs: float
+
+        :returns: None
+        """
+        self.__stop_requested = False
+        end_time = None if duration_secs is None else time.monotonic() + duration_secs
+        backoff = 1.0
+        while not self.__stop_requested:
+            poll_time = time.monotonic()
+            if end_time is not None and poll_time >= end_time:
+                break
+            if self.poll():
+                backoff = 1.0
+            else:
+                backoff = min(backoff * 2, self.__max_backoff)
+            next_time = poll_time + self.__period * backoff
+            if end_time is not None:
+                next_time = min(next_time, end_time)
+            time.sleep(max(0.0, next_time - time.monotonic()))
@@ -0,0 +1,75 @@
+# Benchmark of the I2CDriver transaction latency. Compares GreenPakI2cDriver, which
+# sends each transaction as a single USB exchange, with the legacy per command
+# start/write/start/read/stop sequence of the I2CDriver library, and prints the
+# average time per transaction of 1, 16 and 256 bytes reads and of 1 byte writes.
+#
+# Requires an I2CDriver at 'port' and a GreenPak device at control code 1. The
+# writes rewrite a REGISTER byte with its current value.
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.abspath("../src"))
+
+from greenpak import i2c
+from i2cdriver import I2CDriver
+
+port = "/dev/tty.usbserial-DK0C3UQC"
+i2c_addr = 0b0001000  # REGISTER space of control code 1.
+ITERS = 1000
+
+
+def legacy_read(d: I2CDriver, start: int, n: int) -> bytearray | None:
+    ok = d.start(i2c_addr, 0)
+    if ok:
+        ok = d.write(bytearray([start]))
+    if ok:
+        ok = d.start(i2c_addr, 1)
+    data = d.read(n) if ok else None
+    d.stop()
+    return data
+
+
+def legacy_write(d: I2CDriver, start: int, data: bytearray) -> bool:
+    ok = d.start(i2c_addr, 0)
+    if ok:
+        ok = d.write(bytearray([start]))
+    if ok and len(data) > 0:
+        ok = d.write(data)
+    d.stop()
+    return ok
+
+
+def bench(name: str, read_method, write_method) -> None:
+    for n in (1, 16, 256):
+        start_time = time.perf_counter()
+        for _ in range(ITERS):
+            assert read_method(0, n) is not None
+        elapsed = time.perf_counter() - start_time
+        print(f"{name}: read  {n:3d} bytes: {elapsed * 1e6 / ITERS:8.1f} us/transaction")
+    # Rewrites a byte of the REGISTER space with its current value.
+    value = read_method(0xF0, 1)
+    start_time = time.perf_counter()
+    for _ in range(ITERS):
+        assert write_method(0xF0, value)
+    elapsed = time.perf_counter() - start_time
+    print(f"{name}: write   1 bytes: {elapsed * 1e6 / ITERS:8.1f} us/transaction")
+
+
+print("\nLegacy I2CDriver command sequence.")
+d = I2CDriver(port, reset=True)
+bench(
+    "legacy   ",
+    lambda start, n: legacy_read(d, start, n),
+    lambda start, data: legacy_write(d, start, data),
+)
+d.ser.close()
+
+print("\nGreenPakI2cDriver.")
+gp = i2c.GreenPakI2cDriver(port)
+bench(
+    "pipelined",
+    lambda start, n: gp.gp_read(i2c_addr, start, n),
+    lambda start, data: gp.gp_write(i2c_addr, start, data),
+)
@@ -0,0 +1,102 @@
+# Loopback test of the remote I2C transport that doesn't need hardware. Runs a
+# GreenPakI2cServer over an in-process fake device and a GreenPakRemoteI2c client in the
+# same process, and checks page programming, batch results, server side errors and a
+# connection closed by a timeout.
+
+from greenpak import driver, i2c
+from greenpak.remote import GreenPakI2cServer, GreenPakRemoteI2c, GreenPakRemoteError
+
+device_type = "SLG46826"
+control_code = 0b0001
+
+
+class FakeDevice(i2c.GreenPakI2cInterface):
+    """A SLG46826 at 'control_code' whose memory spaces are byte arrays. Like some real
+    devices, it NACKs the page erase writes even though it erases the page."""
+
+    def __init__(self):
+        self.spaces = {0b000: bytearray(256), 0b010: bytearray(256), 0b011: bytearray(256)}
+        self.fail_batches = False
+
+    def __space(self, i2c_addr):
+        if i2c_addr >> 3 != control_code:
+            return None
+        return self.spaces.get(i2c_addr & 0b111)
+
+    def gp_batch(self, ops):
+        if self.fail_batches:
+            raise RuntimeError("Simulated adapter failure")
+        return super().gp_batch(ops)
+
+    def gp_read(self, i2c_addr, start, byte_count):
+        space = self.__space(i2c_addr)
+        return None if space is None else bytearray(space[start : start + byte_count])
+
+    def gp_write(self, i2c_addr, start, data):
+        space = self.__space(i2c_addr)
+        if space is None:
+            return False
+        if space is self.spaces[0b000] and start == 0xE3:
+            page_index = data[0] & 0b1111
+            target = self.spaces[0b011 if data[0] & 0b10000 else 0b010]
+            target[page_index << 4 : (page_index + 1) << 4] = bytes(16)
+            return False
+        space[start : start + len(data)] = data
+        return True
+
+
+fake = FakeDevice()
+server = GreenPakI2cServer(fake)
+server.start()
+host, server_port = server.address()
+remote_i2c = GreenPakRemoteI2c(host, server_port)
+remote_gp = driver.GreenpakDriver(remote_i2c, device_type, control_code)
+try:
+    print("\nProgramming the EEPROM remotely.")
+    fake.spaces[0b011][:] = bytes([0x55] * 256)
+    eeprom_data = bytearray((i * 7) & 0xFF for i in range(256))
+    remote_gp.program_eeprom_pages(0, eeprom_data)
+    assert fake.spaces[0b011] == eeprom_data, "EEPROM mismatch"
+    assert remote_gp.read_eeprom_bytes(0, 256) == eeprom_data, "EEPROM read mismatch"
+
+    print("\nChecking batch results.")
+    i2c_addr = control_code << 3
+    results = remote_i2c.gp_batch(
+        [
+            ("write", i2c_addr, 0x10, bytearray([1, 2, 3])),
+            ("write_ignore", i2c_addr, 0xE3, bytearray([0x1F])),
+            ("sleep", 0.001),
+            ("read", i2c_addr, 0x10, 3),
+            ("expect", i2c_addr, 0x10, bytearray([1, 2, 4])),
+            ("read", i2c_addr, 0x10, 3),
+        ]
+    )
+    assert results == [True, False, True, bytearray([1, 2, 3]), False], results
+    assert remote_i2c.gp_read(0b1111 << 3, 0, 1) is None
+
+    print("\nChecking a server side error.")
+    fake.fail_batches = True
+    try:
+        remote_i2c.gp_read(i2c_addr, 0, 1)
+        assert False, "Expected a GreenPakRemoteError"
+    except GreenPakRemoteError as e:
+        assert "Simulated adapter failure" in str(e), e
+    fake.fail_batches = False
+    assert remote_i2c.gp_read(i2c_addr, 0x10, 3) == bytearray([1, 2, 3])
+
+    print("\nChecking that a timeout closes the connection.")
+    slow_i2c = GreenPakRemoteI2c(host, server_port, timeout_secs=0.1)
+    try:
+        slow_i2c.gp_batch([("sleep", 0.5)])
+        assert False, "Expected a timeout"
+    except TimeoutError:
+        pass
+    try:
+        slow_i2c.gp_read(i2c_addr, 0, 1)
+        assert False, "Expected a ConnectionError"
+    except ConnectionError:
+        pass
+    print("\nAll OK.")
+finally:
+    remote_i2c.close()
+    server.stop()
@@ -0,0 +1,42 @@
+# Loopback test of the remote I2C transport. Runs a GreenPakI2cServer over a local
+# adapter and a GreenPakRemoteI2c client in the same process, and checks that the
+# device reads the same through both, and that an EEPROM page programmed through the
+# client reads back correctly through the local adapter.
+#
+# Requires an I2C adapter at 'port' and a SLG46826 device at control code 1. Overwrites
+# the last EEPROM page of the device.
+
+import random
+from greenpak import driver, i2c, utils
+from greenpak.remote import GreenPakI2cServer, GreenPakRemoteI2c
+
+port = "/dev/tty.usbmodem1101"
+device_type = "SLG46826"
+control_code = 0b0001
+EEPROM_PAGE = 15
+
+local_i2c = i2c.GreenPakI2cAdapter(port=port)
+local_gp = driver.GreenpakDriver(local_i2c, device_type, control_code)
+
+server = GreenPakI2cServer(local_i2c)
+server.start()
+host, server_port = server.address()
+print(f"Server listening on {host}:{server_port}")
+
+remote_i2c = GreenPakRemoteI2c(host, server_port)
+remote_gp = driver.GreenpakDriver(remote_i2c, device_type, control_code)
+try:
+    print("\nComparing the NVM read locally and remotely.")
+    local_nvm = local_gp.read_nvm_bytes(0, 256)
+    remote_nvm = remote_gp.read_nvm_bytes(0, 256)
+    assert local_nvm == remote_nvm, "NVM reads differ"
+
+    print("\nProgramming an EEPROM page remotely.")
+    page_data = bytearray(random.randint(0, 255) for _ in range(16))
+    utils.hex_dump(page_data, EEPROM_PAGE << 4)
+    remote_gp.program_eeprom_pages(EEPROM_PAGE, page_data)
+    assert local_gp.read_eeprom_bytes(EEPROM_PAGE << 4, 16) == page_data, "EEPROM mismatch"
+    print("\nAll OK.")
+finally:
+    remote_i2c.close()
+    server.stop()